@@ -1,10 +1,16 @@
 """Defines API for creating VISCA packets and enumerations."""
+import struct
+
 try:
     from enum import IntEnum
 except ImportError:
     from uenum import IntEnum
 
-from ptzpicocam.visca import RawViscaPacket
+# Packet formats including the header byte (receiver 1, sender 0) and the terminator
+_PAN_TILT_FORMAT = '>9B'
+_MEM_FORMAT = '>7B'
+_ZOOM_FORMAT = '>6B'
+_ZOOM_STOP = b'\x81\x01\x04\x07\x00\xff'
 
 
 class CameraAPI:
@@ -12,52 +18,51 @@ class CameraAPI:
     """API for controlling a camera with the VISCA protocol."""
 
     @classmethod
-    def create_pan_tilt_packet(cls, buffer: bytearray, pan_speed: int, pan_direction: 'PanDirection', tilt_speed: int, tilt_direction: 'TiltDirection') -> 'RawViscaPacket':
+    def create_pan_tilt_packet(cls, buffer: bytearray, pan_speed: int, pan_direction: 'PanDirection', tilt_speed: int, tilt_direction: 'TiltDirection') -> memoryview:
         """Creates a packet for moving the camera around two axes (pan / title).
 
-        The given buffer must have a capacity of at least 7 bytes. It will
-        raise a RuntimeError if the buffer is too small. It could have been
-        modified even if an exception is thrown.
+        The given buffer must have a capacity of at least 9 bytes. It will
+        raise a RuntimeError if the buffer is too small.
 
         Pan speed must be a value between 1 and 24.
         Tilt speed must be a value between 1 and 23.
         If any of the previous conditions is not met then
-        a ValueError exception will be raised.
+        a ValueError exception will be raised. This check is only
+        done when ``__debug__`` is set (no optimization), otherwise
+        speeds are clamped into their range.
 
         :param buffer: a buffer for holding the packet
         :param pan_direction: a direction around the X axe
-        :param pan_speed: a speed value between 0 and 24
-        :param tilt_speed: a speed value between 0 and 23
+        :param pan_speed: a speed value between 1 and 24
+        :param tilt_speed: a speed value between 1 and 23
         :param tilt_direction: a direction around the Y axe
         :raises RuntimeError: if the buffer is too small
         :raises ValueError: if a speed is not valid or the buffer is too small
-        :returns: a packet containing a drive command
+        :returns: a view on the encoded packet containing a drive command
         """
-        if pan_speed < 1 or pan_speed > 24:
-            raise ValueError('Pan speed must be a value between 1 and 24')
+        if __debug__:
+            if pan_speed < 1 or pan_speed > 24:
+                raise ValueError('Pan speed must be a value between 1 and 24')
 
-        if tilt_speed < 1 or tilt_speed > 24:
-            raise ValueError('Tilt speed must be a value between 1 and 23')
+            if tilt_speed < 1 or tilt_speed > 23:
+                raise ValueError('Tilt speed must be a value between 1 and 23')
 
-        packet = RawViscaPacket(1, 0, buffer)
-        result = packet.write_bytes(b'\x01\x06\x01')
-        result |= packet.write_data(pan_speed)
-        result |= packet.write_data(tilt_speed)
-        result |= packet.write_data(pan_direction)
-        result |= packet.write_data(tilt_direction)
+        if len(buffer) < 9:
+            raise RuntimeError('The buffer requires at least 9 bytes')
 
-        if not result:
-            raise RuntimeError('The buffer requires at least 7 bytes')
+        # Out of range speeds are clamped when the checks above are disabled
+        struct.pack_into(_PAN_TILT_FORMAT, buffer, 0,
+            0x81, 0x01, 0x06, 0x01, max(1, min(24, pan_speed)), max(1, min(23, tilt_speed)),
+            pan_direction, tilt_direction, 0xff)
 
-        return packet
+        return memoryview(buffer)[:9]
 
     @classmethod
-    def create_memory_packet(cls, buffer: bytearray, position_index: int, memory_action: 'MemoryAction') -> 'RawViscaPacket':
+    def create_memory_packet(cls, buffer: bytearray, position_index: int, memory_action: 'MemoryAction') -> memoryview:
         """Creates a packet for interacting with the camera positions memory.
 
-        The given buffer must have a capacity of at least 5 bytes. It will
-        raise a RuntimeError if the buffer is too small. It could have been
-        modified even if an exception is thrown.
+        The given buffer must have a capacity of at least 7 bytes. It will
+        raise a RuntimeError if the buffer is too small.
 
         The camera supports 6 positions : a position must be called by its index.
         It is an integer between 0 and 5 included.
@@ -67,23 +72,21 @@ class CameraAPI:
         :param memory_action: action to perform on the selected position
         :raises RuntimeError: if the buffer is too small
         :raises ValueError: if the index is not valid
-        :returns: a memory packet
+        :returns: a view on the encoded memory packet
         """
         if position_index < 0 or position_index > 5:
             raise ValueError('Position index must be a value between 0 and 5 included')
 
-        packet = RawViscaPacket(1, 0, buffer)
-        result = packet.write_bytes(b'\x01\x04\x3f')
-        result |= packet.write_data(memory_action)
-        result |= packet.write_data(position_index)
+        if len(buffer) < 7:
+            raise RuntimeError('The buffer requires at least 7 bytes')
 
-        if not result:
-            raise RuntimeError('The buffer requires at least 5 bytes')
+        struct.pack_into(_MEM_FORMAT, buffer, 0,
+            0x81, 0x01, 0x04, 0x3f, memory_action, position_index, 0xff)
 
-        return packet
+        return memoryview(buffer)[:7]
 
     @classmethod
-    def create_recall_position_packet(cls, buffer: bytearray, position_index: int) -> 'RawViscaPacket':
+    def create_recall_position_packet(cls, buffer: bytearray, position_index: int) -> memoryview:
         """Creates a packet for recalling a position.
 
         It is an alias of :py:meth:`~.CameraAPI.create_memory_packet`. 
@@ -91,7 +94,7 @@ class CameraAPI:
         return cls.create_memory_packet(buffer, position_index, MemoryAction.RECALL)
 
     @classmethod
-    def create_reset_position_packet(cls, buffer: bytearray, position_index: int) -> 'RawViscaPacket':
+    def create_reset_position_packet(cls, buffer: bytearray, position_index: int) -> memoryview:
         """Creates a packet for resetting a position.
 
         It is an alias of :py:meth:`~.CameraAPI.create_memory_packet`. 
@@ -99,7 +102,7 @@ class CameraAPI:
         return cls.create_memory_packet(buffer, position_index, MemoryAction.RESET)
 
     @classmethod
-    def create_set_position_packet(cls, buffer: bytearray, position_index: int) -> 'RawViscaPacket':
+    def create_set_position_packet(cls, buffer: bytearray, position_index: int) -> memoryview:
         """Creates a packet for setting a position.
 
         It is an alias of :py:meth:`~.CameraAPI.create_memory_packet`. 
@@ -107,75 +110,90 @@ class CameraAPI:
         return cls.create_memory_packet(buffer, position_index, MemoryAction.SET)
 
     @classmethod
-    def create_stop_zoom_packet(cls, buffer: bytearray) -> 'RawViscaPacket':
+    def create_stop_zoom_packet(cls, buffer: bytearray) -> memoryview:
         """Creates a packet for stopping the camera zoom..
 
-        The given buffer must have a capacity of at least 4 bytes. It will
-        raise a RuntimeError if the buffer is too small. It could have been
-        modified even if an exception is thrown.
+        The given buffer must have a capacity of at least 6 bytes. It will
+        raise a RuntimeError if the buffer is too small.
 
         :raises RuntimeError: if the buffer is too small
-        :returns: a packet containing a stop zoom command
+        :returns: a view on the encoded packet containing a stop zoom command
         """
-        packet = RawViscaPacket(1, 0, buffer)
-        result = packet.write_bytes(b'\x01\x04\x07\x00')
+        if len(buffer) < 6:
+            raise RuntimeError('The buffer must have a capacity of at least 6 bytes')
 
-        if not result:
-            raise RuntimeError('The buffer must have a capacity of at least 4 bytes')
+        buffer[0:6] = _ZOOM_STOP
 
-        return packet
+        return memoryview(buffer)[:6]
 
     @classmethod
-    def create_zoom_packet(cls, buffer: bytearray, zoom_speed: int, direction: 'ZoomDirection') -> 'RawViscaPacket':
+    def create_zoom_packet(cls, buffer: bytearray, zoom_speed: int, direction: 'ZoomDirection') -> memoryview:
         """Creates a packet for controlling the camera zoom.
 
-        The given buffer must have a capacity of at least 4 bytes. It will
-        raise a RuntimeError if the buffer is too small. It could have been
-        modified even if an exception is thrown.
+        The given buffer must have a capacity of at least 6 bytes. It will
+        raise a RuntimeError if the buffer is too small.
 
         :param zoom_speed: a speed value between 0 and 7
         :param direction: a direction
         :raises RuntimeError: if the buffer is too small
         :raises ValueError: if zoom_speed is not between 0 and 7 included
-        :returns: a packet containing a zoom command
+        :returns: a view on the encoded packet containing a zoom command
         """
         if zoom_speed < 0 or zoom_speed > 7:
             raise ValueError('Zoom speed must be a value between 0 and 7 included')
 
-        packet = RawViscaPacket(1, 0, buffer)
-        result = packet.write_bytes(b'\x01\x04\x07')
-        result |= packet.write_data(direction << 4 | zoom_speed)
+        if len(buffer) < 6:
+            raise RuntimeError('The buffer must have a capacity of at least 6 bytes')
+
+        struct.pack_into(_ZOOM_FORMAT, buffer, 0,
+            0x81, 0x01, 0x04, 0x07, (direction << 4) + zoom_speed, 0xff)
+
+        return memoryview(buffer)[:6]
+
+
+# Plain integer values, cheaper than enum attribute lookups on MicroPython
+MA_RESET = 0
+MA_SET = 1
+MA_RECALL = 2
+MA_NONE = 3
+
+PAN_LEFT = 1
+PAN_RIGHT = 2
+PAN_NONE = 3
 
-        if not result:
-            raise RuntimeError('The buffer must have a capacity of at least 4 bytes')
+TILT_UP = 1
+TILT_DOWN = 2
+TILT_NONE = 3
 
-        return packet
+ZOOM_NONE = 0
+ZOOM_TELE = 2
+ZOOM_WIDE = 3
 
 
 class MemoryAction(IntEnum):
 
     """Available actions when interacting with camera positions memory."""
 
-    RESET = 0
-    SET = 1
-    RECALL = 2
-    NONE = 3
+    RESET = MA_RESET
+    SET = MA_SET
+    RECALL = MA_RECALL
+    NONE = MA_NONE
 
 class PanDirection(IntEnum):
 
     """Represents a direction for the pan (X axe)."""
 
-    LEFT = 1
-    RIGHT = 2
-    NONE = 3
+    LEFT = PAN_LEFT
+    RIGHT = PAN_RIGHT
+    NONE = PAN_NONE
 
 class TiltDirection(IntEnum):
 
     """Represents a direction for the tilt (Y axe)."""
 
-    UP = 1
-    DOWN = 2
-    NONE = 3
+    UP = TILT_UP
+    DOWN = TILT_DOWN
+    NONE = TILT_NONE
 
 class ZoomDirection(IntEnum):
 
@@ -184,6 +202,6 @@ class ZoomDirection(IntEnum):
     TELE = FORWARD
     WIDE = BACKWARD"""
 
-    NONE = 0
-    TELE = 2
-    WIDE = 3
+    NONE = ZOOM_NONE
+    TELE = ZOOM_TELE
+    WIDE = ZOOM_WIDE
@@ -1,7 +1,15 @@
 """Code for controlling a PTZ camera through the UART with a Raspberry PI Pico."""
 import time
+from array import array
 
-from machine import ADC, UART, Pin, Timer
+import rp2
+from machine import ADC, UART, Pin, mem32
+
+try:
+    import micropython
+except ImportError:
+    from ptzpicocam import umicropython as micropython
+    from ptzpicocam.umicropython import ptr8, ptr16, ptr32
 
 try:
     from ptzpicocam.camera import *
@@ -12,12 +20,62 @@ BTN1_PIN = Pin(10, Pin.IN)
 BTN2_PIN = Pin(11, Pin.IN)
 BTN3_PIN = Pin(12, Pin.IN)
 
+# Configures the joystick pins as ADC inputs (channels 0, 1 and 2)
 JOYX_PIN = ADC(Pin(26))
 JOYY_PIN = ADC(Pin(27))
 ZOOM_PIN = ADC(Pin(28))
 
+# RP2040 ADC registers
+ADC_CS = 0x4004c000
+ADC_FCS = 0x4004c008
+ADC_FIFO = 0x4004c00c
+ADC_DIV = 0x4004c010
+
+ADC_CS_EN = 1 << 0
+ADC_CS_START_MANY = 1 << 3
+ADC_CS_READY = 1 << 8
+# Channels 0, 1, 2 and the temperature sensor (4) so that a round fills 8 bytes
+ADC_CS_RROBIN_JOYSTICK = 0b10111 << 16
+
+# 48MHz / 12000 : 4000 samples/s, 1000 samples/s for each channel
+ADC_DIV_1KSPS = 11999 << 8
+
+ADC_FCS_EN = 1 << 0
+ADC_FCS_DREQ_EN = 1 << 3
+ADC_FCS_EMPTY = 1 << 8
+ADC_FCS_UNDER = 1 << 10
+ADC_FCS_OVER = 1 << 11
+ADC_FCS_THRESH_1 = 1 << 24
+
+DREQ_ADC = 36
+ADC_DMA_COUNT = 0x7fffffff # About 6 days of samples before the DMA must be restarted
+
+# 12 bits samples of the joystick channels (x, y, zoom then temperature),
+# continuously written by the DMA. The write ring requires the buffer to be
+# aligned on its size, which is the case of heap allocated buffers.
+_ADC_BUFFER = bytearray(8)
+
+# RP2040 SIO registers for setting and clearing outputs without a method call,
+# the zoom LED pin must be configured as an output by __main__
+SIO_GPIO_OUT_SET = 0xd0000014
+SIO_GPIO_OUT_CLR = 0xd0000018
+ZOOM_LED_MASK = 1 << 5
+
+# Room for a memory, a zoom and a pan tilt packet sent in a single write
+_TX_BUFFER = bytearray(32)
+
+# Size of the UART transmit ring, two batches of packets can be queued
+# without blocking the loop while they are shifted out at 9600 bauds
+UART_TXBUF_SIZE = 2 * len(_TX_BUFFER)
+
 TIME_FOR_MEMORY_COMMAND_MEMORY = 5000 # Required Ms before sending again drive packets
 
+JOYSTICK_PERIOD_MS = 33 # Joystick values are converted and sent at 30Hz
+
+PAN_MAX_SPEED = 0x18
+TILT_MAX_SPEED = 0x17
+ZOOM_MAX_SPEED = 7
+
 
 class Button:
 
@@ -37,42 +95,65 @@ class Button:
         self.pressed = False
         self.index = position_index
 
-    def isr(self):
+    def isr(self, pin: 'Pin' = None):
         """Called when a button pin detects a change (falling or rising edge).
         
         The isr prevents a rebound by saving the timestamp of the last call.
+        It is registered as a soft irq : micropython already schedules it
+        outside of the interrupt context.
+
+        :param pin: pin that triggered the irq, unused
         """
         t = time.ticks_ms()
 
-        if t - self.last_pressed_time > self.REBOUND_TIME:
+        if time.ticks_diff(t, self.last_pressed_time) > self.REBOUND_TIME:
             self.last_pressed_time = t
             self.triggered_flag = True
 
     @property
     def press_type(self) -> 'ButtonPressType':
-        """Gets the press type."""
-        if self.pressed:
-            if time.ticks_ms() - self.time_pressed < self.LONG_PRESS_TIME:
-                pt = ButtonPressType.SHORT_PRESS
-            else:
-                pt = ButtonPressType.LONG_PRESS
-            self.pressed = False
-        else:
-            self.pressed = True
-            self.time_pressed = time.ticks_ms()
+        """Gets the press type.
+
+        Durations are computed with ``time.ticks_diff`` so the ticks counter
+        can wrap around.
+        """
+        pressed = self.pressed
+        self.pressed = not pressed
+
+        if pressed:
+            # SHORT_PRESS + 1 is LONG_PRESS
+            return SHORT_PRESS + (time.ticks_diff(time.ticks_ms(), self.time_pressed) >= self.LONG_PRESS_TIME)
+
+        self.time_pressed = time.ticks_ms()
 
-            pt = ButtonPressType.NONE
+        return PRESS_NONE
 
-        return pt
+
+PRESS_NONE = 0
+SHORT_PRESS = 1
+LONG_PRESS = 2
 
 
 class ButtonPressType(IntEnum):
 
     """Reprents a button press type."""
 
-    NONE = 0
-    SHORT_PRESS = 1
-    LONG_PRESS = 2
+    NONE = PRESS_NONE
+    SHORT_PRESS = SHORT_PRESS
+    LONG_PRESS = LONG_PRESS
+
+
+# Memory actions indexed by a button press type
+_PRESS_ACTIONS = (MA_NONE, MA_RECALL, MA_SET)
+
+
+# Indexes of the camera state
+STATE_PAN_SPEED = 0
+STATE_PAN_DIR = 1
+STATE_TILT_SPEED = 2
+STATE_TILT_DIR = 3
+STATE_ZOOM_SPEED = 4
+STATE_ZOOM_DIR = 5
 
 
 class Camera:
@@ -80,17 +161,14 @@ class Camera:
     """Structure containing informations to send to a camera."""
 
     def __init__(self) -> None:
-        self.pan_speed = 1
-        self.pan_dir = PanDirection.NONE
-
-        self.tilt_speed = 1
-        self.tilt_dir = TiltDirection.NONE
-
-        self.zoom_speed = 1
-        self.zoom_dir = ZoomDirection.NONE
+        # Speeds and directions of pan, tilt and zoom, see STATE_* indexes
+        self.state = array('B', (1, PAN_NONE, 1, TILT_NONE, 1, ZOOM_NONE))
         
         self.memory_index = 0
-        self.memory_command = MemoryAction.NONE
+        self.memory_command = MA_NONE
+
+        # Pan and tilt speeds and directions of the last drive packet sent
+        self.last_pan_tilt_state = -1
 
 
 class Joystick:
@@ -104,20 +182,20 @@ class Joystick:
         :param max_adc_val: maximal value returned by the device ADC
         :param deadzone: deadzone in percentage based on the max_adc_val param
         """
-        self.x = 0
-        self.y = 0
-        self.zoom = 0
         self.min_adc_val = min_adc_val
         self.max_adc_val = max_adc_val
         self.left_limit = 0
         self.right_limit = 0
         self.deadzone = deadzone
-        self.read_joystick_flag = False
+
+        # left_limit, right_limit, then left and right slopes for pan, tilt and zoom
+        self.bounds = array('i', (0, 0, 0, 0, 0, 0, 0, 0))
 
     def compute_bounds(self) -> None:
         """Computes left and right bounds according to the deadzone.
         
-        Attributes :py:attr:`~.Joystick.left_limit` and :py:attr:`~.Joystick.right_limit` will be set.
+        Attributes :py:attr:`~.Joystick.left_limit`, :py:attr:`~.Joystick.right_limit`
+        and :py:attr:`~.Joystick.bounds` will be set.
         """
         center = self.max_adc_val // 2
         threshold = center * self.deadzone // 100
@@ -125,172 +203,229 @@ class Joystick:
         self.left_limit = center - threshold
         self.right_limit = center + threshold
 
+        left_range = self.left_limit - self.min_adc_val
+        right_range = self.max_adc_val - self.right_limit
 
-def convert_joyx_to_pan(joystick: 'Joystick', camera: 'Camera') -> bool:
-    """Converts a joystick axe value into a camera value.
-    
-    Attributes :py:attr:`~.Camera.pan_dir` and :py:attr:`~.Camera.pan_speed`
-    will be modified.
-    
-    :param joystick: instance of the joystick containing the value to convert
-    :param camera: instance of the camera to update
-    :returns: True if the joystick is in the deadzone, otherwise False
+        self.bounds[0] = self.left_limit
+        self.bounds[1] = self.right_limit
+        self.bounds[2] = compute_slope(PAN_MAX_SPEED, left_range)
+        self.bounds[3] = compute_slope(PAN_MAX_SPEED, right_range)
+        self.bounds[4] = compute_slope(TILT_MAX_SPEED, left_range)
+        self.bounds[5] = compute_slope(TILT_MAX_SPEED, right_range)
+        self.bounds[6] = compute_slope(ZOOM_MAX_SPEED, left_range)
+        self.bounds[7] = compute_slope(ZOOM_MAX_SPEED, right_range)
+
+
+def compute_slope(max_speed: int, value_range: int) -> int:
+    """Computes the slope for converting a distance into a speed between 1 and max_speed.
+
+    The slope is a Q16 fixed-point value, rounded up so that the maximal
+    speed is reached at the end of the range.
+
+    :param max_speed: speed at the end of the range
+    :param value_range: length of the range of values
+    :returns: the slope in Q16 or 0 if the range is empty
     """
-    in_deadzone = False
-
-    if joystick.x < joystick.left_limit:
-        camera.pan_speed = convert_range(abs(joystick.x - joystick.left_limit), joystick.min_adc_val, joystick.left_limit, 1, 0x18)
-        camera.pan_dir = PanDirection.RIGHT
-    elif joystick.x > joystick.right_limit:
-        camera.pan_speed = convert_range(joystick.x, joystick.right_limit, joystick.max_adc_val, 1, 0x18)
-        camera.pan_dir = PanDirection.LEFT
-    else:
-        camera.pan_speed = 1
-        camera.pan_dir = PanDirection.NONE
-        in_deadzone = True
+    if value_range <= 0:
+        return 0
 
-    return in_deadzone
+    return (((max_speed - 1) << 16) + value_range - 1) // value_range
 
 
-def convert_joyy_to_tilt(joystick: 'Joystick', camera: 'Camera') -> bool:
-    """Converts a joystick axe value into a camera value.
-    
-    Attributes :py:attr:`~.Camera.tilt_dir` and :py:attr:`~.Camera.tilt_speed`
-    will be modified.
-    
-    :param joystick: instance of the joystick containing the value to convert
-    :param camera: instance of the camera to update
-    :returns: True if the joystick is in the deadzone, otherwise False
+@micropython.viper
+def convert_all(values: ptr16, bounds: ptr32, state: ptr8) -> int:
+    """Converts joystick axes values into camera speeds and directions.
+
+    The values must contain the pan, tilt and zoom axes in this order and the
+    bounds must contain the left limit, the right limit and the Q16 slopes
+    of each axe computed by :py:meth:`~.Joystick.compute_bounds`.
+
+    Directions are written as integers because viper functions can not
+    use module constants without boxing them.
+
+    :param values: joystick axes values
+    :param bounds: joystick bounds
+    :param state: camera state to update
+    :returns: pan and tilt speeds and directions packed into an integer
     """
-    in_deadzone = False
-
-    if joystick.y < joystick.left_limit:
-        camera.tilt_speed = convert_range(abs(joystick.y - joystick.left_limit), joystick.min_adc_val, joystick.left_limit, 1, 0x17)
-        camera.tilt_dir = TiltDirection.UP
-    elif joystick.y > joystick.right_limit:
-        camera.tilt_speed = convert_range(joystick.y, joystick.right_limit, joystick.max_adc_val, 1, 0x17)
-        camera.tilt_dir = TiltDirection.DOWN
+    left = bounds[0]
+    right = bounds[1]
+
+    x = values[0]
+    y = values[1]
+    zoom = values[2]
+
+    if x < left:
+        pan_speed = (((left - x) * bounds[2]) >> 16) + 1
+        pan_dir = 2 # PAN_RIGHT
+    elif x > right:
+        pan_speed = (((x - right) * bounds[3]) >> 16) + 1
+        pan_dir = 1 # PAN_LEFT
     else:
-        camera.tilt_speed = 1
-        camera.tilt_dir = TiltDirection.NONE
-        in_deadzone = True
+        pan_speed = 1
+        pan_dir = 3 # PAN_NONE
+
+    if y < left:
+        tilt_speed = (((left - y) * bounds[4]) >> 16) + 1
+        tilt_dir = 1 # TILT_UP
+    elif y > right:
+        tilt_speed = (((y - right) * bounds[5]) >> 16) + 1
+        tilt_dir = 2 # TILT_DOWN
+    else:
+        tilt_speed = 1
+        tilt_dir = 3 # TILT_NONE
+
+    if zoom < left:
+        state[4] = (((left - zoom) * bounds[6]) >> 16) + 1
+        state[5] = 3 # ZOOM_WIDE
+    elif zoom > right:
+        state[4] = (((zoom - right) * bounds[7]) >> 16) + 1
+        state[5] = 2 # ZOOM_TELE
+    else:
+        state[4] = 1
+        state[5] = 0 # ZOOM_NONE
 
-    return in_deadzone
+    state[0] = pan_speed
+    state[1] = pan_dir
+    state[2] = tilt_speed
+    state[3] = tilt_dir
 
+    return (pan_speed << 24) | (tilt_speed << 16) | (pan_dir << 8) | tilt_dir
 
-def convert_zoom(joystick: 'Joystick', camera: 'Camera') -> bool:
-    """Converts a joystick axe value into a camera value.
-    
-    Attributes :py:attr:`~.Camera.zoom_dir` and :py:attr:`~.Camera.zoom_speed`
-    will be modified.
-    
-    :param joystick: instance of the joystick containing the value to convert
-    :param camera: instance of the camera to update
-    :returns: True if the joystick is in the deadzone, otherwise False
+
+@micropython.native
+def start_adc_capture(adc_dma) -> None:
+    """Starts the continuous conversion of the joystick channels.
+
+    The ADC runs freely in round robin mode and the DMA copies each sample
+    into a ring over the ADC buffer: the latest joystick values are always
+    available in memory without involving the CPU. The capture must be
+    started again when the DMA channel is no longer active.
+
+    :param adc_dma: DMA channel reading the ADC fifo
     """
-    in_deadzone = False
-
-    if joystick.zoom < joystick.left_limit:
-        camera.zoom_speed = convert_range(abs(joystick.zoom - joystick.left_limit), joystick.min_adc_val, joystick.left_limit, 1, 7)
-        camera.zoom_dir = ZoomDirection.WIDE
-    elif joystick.zoom > joystick.right_limit:
-        camera.zoom_speed = convert_range(joystick.zoom, joystick.right_limit, joystick.max_adc_val, 1, 7)
-        camera.zoom_dir = ZoomDirection.TELE
-    else:
-        camera.zoom_speed = 1
-        camera.zoom_dir = ZoomDirection.NONE
-        in_deadzone = True
+    # Waits for the end of the current conversion before draining the fifo
+    mem32[ADC_CS] = ADC_CS_EN
+    while not mem32[ADC_CS] & ADC_CS_READY:
+        pass
+
+    mem32[ADC_FCS] = ADC_FCS_EN | ADC_FCS_DREQ_EN | ADC_FCS_THRESH_1 | ADC_FCS_UNDER | ADC_FCS_OVER
+    while not mem32[ADC_FCS] & ADC_FCS_EMPTY:
+        mem32[ADC_FIFO]
 
-    return in_deadzone
+    mem32[ADC_DIV] = ADC_DIV_1KSPS
 
+    # Write ring of 2^3 bytes
+    adc_dma.config(
+        read=ADC_FIFO, write=_ADC_BUFFER, count=ADC_DMA_COUNT,
+        ctrl=adc_dma.pack_ctrl(size=1, inc_read=False, ring_sel=True, ring_size=3, treq_sel=DREQ_ADC),
+        trigger=True
+    )
 
-def convert_range(value: int, old_min: int, old_max: int, new_min: int, new_max: int) -> int:
-    return ((value - old_min) // (old_max - old_min)) * (new_max - new_min) + new_min
+    # AINSEL = 0 : the first sample comes from channel 0
+    mem32[ADC_CS] = ADC_CS_EN | ADC_CS_RROBIN_JOYSTICK | ADC_CS_START_MANY
 
 
-def loop(joystick: 'Joystick', camera: 'Camera', uart, buttons: 'List[Button]') -> None:
+def loop(joystick: 'Joystick', camera: 'Camera', uart, buttons: 'List[Button]', adc_dma) -> None:
     """Main loop.
     
     :param joystick: instance of a joystick
     :param camera: instance of a camera to control
     :param uart: uart for sending packets
     :param buttons: list of buttons for controlling positions
+    :param adc_dma: DMA channel capturing joystick values
     """
-    buffer = bytearray(16)
-    ZOOM_LED_PIN = Pin(5, Pin.OUT)
+    next_tick = time.ticks_ms()
+
+    buffer_view = memoryview(_TX_BUFFER)
+    bounds = joystick.bounds
+    state = camera.state
+
+    # Bound methods are cached as locals to avoid attribute lookups in the loop
+    uart_write = uart.write
+    adc_dma_active = adc_dma.active
+    ticks_ms = time.ticks_ms
+    ticks_diff = time.ticks_diff
+    ticks_add = time.ticks_add
 
     while True:
         for btn in buttons:
             if btn.triggered_flag:
                 btn.triggered_flag = False
                 
-                press_type = btn.press_type
+                action = _PRESS_ACTIONS[btn.press_type]
 
-                if press_type == ButtonPressType.SHORT_PRESS:
-                    camera.memory_index = btn.index
-                    camera.memory_command = MemoryAction.RECALL
-                elif press_type == ButtonPressType.LONG_PRESS:
+                if action != MA_NONE:
                     camera.memory_index = btn.index
-                    camera.memory_command = MemoryAction.SET
+                    camera.memory_command = action
             
-        if joystick.read_joystick_flag:
-            joystick.read_joystick_flag = False
+        now = ticks_ms()
 
-            # Reads joystick values from ADC
-            joystick.x = JOYX_PIN.read_u16()
-            joystick.y = JOYY_PIN.read_u16()
-            joystick.zoom = ZOOM_PIN.read_u16()
+        if ticks_diff(now, next_tick) >= 0:
+            next_tick = ticks_add(now, JOYSTICK_PERIOD_MS)
 
-            convert_joyx_to_pan(joystick, camera)
-            convert_joyy_to_tilt(joystick, camera)
-            zoom_in_deadzone = convert_zoom(joystick, camera)
+            if not adc_dma_active():
+                start_adc_capture(adc_dma)
 
-            if zoom_in_deadzone:
-                ZOOM_LED_PIN.on()
-                zoom_packet = CameraAPI.create_zoom_packet(buffer, camera.zoom_speed, camera.zoom_dir)
-            else:
-                ZOOM_LED_PIN.off()
-                zoom_packet = CameraAPI.create_stop_zoom_packet(buffer)
+            # Converts the latest joystick values copied by the DMA
+            pan_tilt_state = convert_all(_ADC_BUFFER, bounds, state)
 
+            # Packets are written one after the other in the buffer
+            size = 0
 
-            if camera.memory_command != MemoryAction.NONE:
-                if camera.memory_command == MemoryAction.RECALL:
-                    memory_packet = CameraAPI.create_recall_position_packet(buffer,camera.memory_index)
-                else:
-                    memory_packet = CameraAPI.create_set_position_packet(buffer,camera.memory_index)
+            if camera.memory_command != MA_NONE:
+                packet = CameraAPI.create_memory_packet(buffer_view[size:], camera.memory_index, camera.memory_command)
 
-                uart.write(memory_packet.encode())
-                camera.memory_command = MemoryAction.NONE
+                size += len(packet)
+                camera.memory_command = MA_NONE
 
-            uart.write(zoom_packet.encode())
+            if state[STATE_ZOOM_DIR] == ZOOM_NONE:
+                mem32[SIO_GPIO_OUT_SET] = ZOOM_LED_MASK
+                packet = CameraAPI.create_stop_zoom_packet(buffer_view[size:])
+            else:
+                mem32[SIO_GPIO_OUT_CLR] = ZOOM_LED_MASK
+                packet = CameraAPI.create_zoom_packet(buffer_view[size:], state[STATE_ZOOM_SPEED], state[STATE_ZOOM_DIR])
 
-            pan_tilt_packet = CameraAPI.create_pan_tilt_packet(buffer, camera.pan_speed, camera.pan_dir, camera.tilt_speed, camera.tilt_dir)
-            uart.write(pan_tilt_packet.encode())
+            size += len(packet)
 
+            # The drive packet is only sent when the pan or the tilt changes
+            if pan_tilt_state != camera.last_pan_tilt_state:
+                packet = CameraAPI.create_pan_tilt_packet(
+                    buffer_view[size:], state[STATE_PAN_SPEED], state[STATE_PAN_DIR],
+                    state[STATE_TILT_SPEED], state[STATE_TILT_DIR]
+                )
+                size += len(packet)
+                camera.last_pan_tilt_state = pan_tilt_state
 
-def timer_isr(joystick: 'Joystick'):
-    joystick.read_joystick_flag = True
+            uart_write(buffer_view[:size])
 
 
 if __name__ == '__main__':
     camera = Camera()
 
-    joystick = Joystick(0, 0xffff, 5)
+    # Samples from the ADC fifo are not scaled to 16 bits like read_u16
+    joystick = Joystick(0, 0xfff, 5)
     joystick.compute_bounds()
 
-    timer0 = Timer()
-    timer0.init(freq=30, mode=Timer.PERIODIC, callback=lambda t: timer_isr(joystick))
+    adc_dma = rp2.DMA()
+    start_adc_capture(adc_dma)
+
+    # Writes are copied into the transmit ring and sent by interrupts
+    uart1 = UART(1, baudrate=9600, tx=Pin(4), rx=Pin(5), txbuf=UART_TXBUF_SIZE)
 
-    uart1 = UART(1, baudrate=9600, tx=Pin(4), rx=Pin(5))
+    # GPIO5 is shared between the UART1 RX and the zoom LED. Nothing is read
+    # from the camera, the pin is claimed as an output once the UART has been
+    # created, otherwise the UART would switch it back to its RX function.
+    zoom_led_pin = Pin(5, Pin.OUT)
     
     btn1 = Button(0)
     btn2 = Button(1)
     btn3 = Button(2)
     
-    BTN1_PIN.irq(lambda p: btn1.isr())
-    BTN2_PIN.irq(lambda p: btn2.isr())
-    BTN3_PIN.irq(lambda p: btn3.isr())
+    BTN1_PIN.irq(btn1.isr)
+    BTN2_PIN.irq(btn2.isr)
+    BTN3_PIN.irq(btn3.isr)
 
     buttons = [btn1, btn2, btn3]
 
-    loop(joystick, camera, uart1, buttons)
+    loop(joystick, camera, uart1, buttons, adc_dma)
@@ -0,0 +1,25 @@
+"""Dummy module for keeping compatibility between python and micropython."""
+
+def native(f):
+    """Emulates the native code emitter decorator from micropython module."""
+    return f
+
+
+def viper(f):
+    """Emulates the viper code emitter decorator from micropython module."""
+    return f
+
+
+def ptr8(x):
+    """Emulates the ptr8 cast available in viper functions."""
+    return x
+
+
+def ptr16(x):
+    """Emulates the ptr16 cast available in viper functions."""
+    return x
+
+
+def ptr32(x):
+    """Emulates the ptr32 cast available in viper functions."""
+    return x
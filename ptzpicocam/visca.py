@@ -35,6 +35,28 @@ class RawViscaPacket:
 
         return self.buffer_view[:self.data_size + 2]
 
+    def encode_into(self, dst: bytearray, offset: int) -> int:
+        """Writes the whole packet into the given buffer, without creating a view.
+
+        Packets can be written one after the other in the same buffer.
+        If the packet does not fit in the buffer then nothing is written.
+
+        :param dst: destination buffer
+        :param offset: position of the first byte of the packet in the buffer
+        :returns: the position following the packet or -1 if the buffer is too small
+        """
+        size = self.data_size
+        end = offset + size + 2
+
+        if end > len(dst):
+            return -1
+
+        dst[offset] = (1<<7) | ((self.sender_addr & 0x7) << 4) | (self.receiver_addr & 0x7)
+        dst[offset + 1:end - 1] = self.buffer_view[1:1 + size]
+        dst[end - 1] = 0xff
+
+        return end
+
     @property
     def data(self) -> memoryview:
         """Gets a pointer on the buffer containing the packet data."""
@@ -51,28 +73,91 @@ class RawViscaPacket:
         :param buffer: a buffer for holding the packet
         :param stream: stream of bytes
         :return: a new instance of :py:class:`~.RawViscaPacket` representing the packet or None if the buffer is too small
+            or if the stream ends before the terminator
         """
-        header = stream.read(1)[0]
+        packet = RawViscaPacket(0, 0, buffer)
+
+        if not packet.decode_into(stream):
+            return None
 
-        receiver_addr = header & 0x7
-        sender_addr = (header >> 4) & 0x7
+        return packet
 
-        packet = RawViscaPacket(receiver_addr, sender_addr, buffer)
+    def decode_into(self, stream: BinaryIO) -> bool:
+        """Decodes a packet from the given stream into this instance.
 
-        i = 0
+        The packet is reset and its buffer is reused, no allocation is made.
+        See :py:meth:`~.RawViscaPacket.decode` for the requirements on the stream.
+
+        :param stream: stream of bytes
+        :returns: True if the packet has been decoded, False if the buffer is too small
+            or if the stream ends before the terminator
+        """
+        # read returns an empty bytes (or None with micropython) at the end of the stream
+        data = stream.read(1)
+        if not data:
+            return False
+
+        header = data[0]
+
+        self.reset(header & 0x7, (header >> 4) & 0x7)
+
+        # Bytes are written directly in the buffer, without calling write_data
+        buffer = self.buffer
+        max_size = len(buffer) - 2
+        size = 0
 
         while True:
-            data = stream.read(1)[0]
+            data = stream.read(1)
+            if not data:
+                return False
+
+            b = data[0]
 
-            if data == 0xff:
+            if b == 0xff:
                 break
 
-            if not packet.write_data(data):
-                return None
+            if size >= max_size:
+                return False
 
-            i += 1
+            buffer[1 + size] = b
+            size += 1
 
-        return packet
+        self.data_size = size
+
+        return True
+
+    def decode_bytes(self, data: bytes) -> bool:
+        """Decodes a packet already read from a stream into this instance.
+
+        The data must start with the header and end with the terminator,
+        it is copied in one operation instead of being read byte by byte.
+
+        :param data: bytes of the packet
+        :returns: True if the packet has been decoded, False if the terminator
+            is missing or if the buffer is too small
+        """
+        end = data.find(b'\xff', 1)
+
+        if end < 0 or end - 1 > len(self.buffer) - 2:
+            return False
+
+        header = data[0]
+        self.reset(header & 0x7, (header >> 4) & 0x7)
+
+        self.buffer_view[1:end] = data[1:end]
+        self.data_size = end - 1
+
+        return True
+
+    def reset(self, receiver_addr: int, sender_addr: int) -> None:
+        """Sets the addresses of the packet and empties its body.
+
+        :param receiver_addr: address of the receiver
+        :param sender_addr: address of the sender
+        """
+        self.receiver_addr = receiver_addr
+        self.sender_addr = sender_addr
+        self.data_size = 0
 
     def write_data(self, b: int) -> bool:
         """Writes a byte in the buffer at the next available position.
@@ -93,13 +178,19 @@ class RawViscaPacket:
     def write_bytes(self, data: bytes) -> bool:
         """Writes bytes in the buffer at the next available position.
         
-        If the buffer is full then it will return False.
+        If the buffer can not hold all bytes then nothing is written
+        and it will return False.
         
-        :param b: a byte to write
+        :param data: bytes to write
         :returns: True if all bytes have be written in the buffer, otherwise False
         """
-        for b in data:
-            if not self.write_data(b):
-                return False
+        start = 1 + self.data_size
+        end = start + len(data)
+
+        if end > len(self.buffer) - 1:
+            return False
+
+        self.buffer_view[start:end] = data
+        self.data_size += len(data)
 
         return True
@@ -1,21 +1,31 @@
 """Defines functions for handling incoming VISCA packets."""
 import logging
+import math
 from queue import Empty, Queue
 from threading import Thread
-from typing import Callable, Dict, List
+from typing import Callable, Dict, Optional, Tuple
 
 from ptzpicocam.visca import RawViscaPacket
 from serial import Serial, SerialException
 
 from ptzsimcam.robot_camera import RobotCamera
 
-SPEEDS_LOOKUP: List[float] = [0,
-    1.3, 1.7, 2.2, 3.2, 5.4, 11, 16, 21,
-    27, 31, 35, 40, 42, 44, 46, 48,
-    50, 79, 81, 83, 85, 87, 90, 100
-]
+SPEEDS_LOOKUP: Tuple[float, ...] = (0.0,
+    1.3, 1.7, 2.2, 3.2, 5.4, 11.0, 16.0, 21.0,
+    27.0, 31.0, 35.0, 40.0, 42.0, 44.0, 46.0, 48.0,
+    50.0, 79.0, 81.0, 83.0, 85.0, 87.0, 90.0, 100.0
+)
 """Association between a speed value (from 1 to 0x18, it is an index) to a speed in degrees/s."""
 
+SPEEDS_LOOKUP_RAD: Tuple[float, ...] = tuple(math.radians(speed) for speed in SPEEDS_LOOKUP)
+"""Same as :py:data:`SPEEDS_LOOKUP` with speeds in radians/s."""
+
+DIRECTION_SIGNS: Tuple[int, ...] = (0, 1, -1) + (0,) * 253
+"""Sign of a speed indexed by a pan or a tilt direction byte (1 and 2), other values stop the axe."""
+
+ZOOM_SIGNS: Tuple[Optional[int], ...] = (0, None, -1, 1) + (None,) * 12
+"""Sign of the zoom speed indexed by a zoom direction (stop, wide, tele), None for unknown directions."""
+
 logger = logging.getLogger(__name__)
 
 
@@ -33,11 +43,19 @@ def serial_control_thread(serial_port: str, packets_queue: "Queue[RawViscaPacket
         logger.error(f'Unable to connect to {serial_port}')
         return
 
+    # Packets are recycled : two can be in the hands of the consumer (a pending
+    # pan tilt packet and the current one) and one is being decoded while the
+    # queue is full, so they are never overwritten before being processed.
+    pool = [RawViscaPacket(0, 0, bytearray(16)) for _ in range(packets_queue.maxsize + 3)]
+    pool_index = 0
+
     while True:
-        p = RawViscaPacket.decode(bytearray(16), conn)
+        p = pool[pool_index]
 
-        if not p is None:
+        # A whole packet is read at once instead of one byte per call
+        if p.decode_bytes(conn.read_until(b'\xff', 16)):
             packets_queue.put(p, block=True, timeout=None)
+            pool_index = (pool_index + 1) % len(pool)
 
 
 class CameraServer:
@@ -46,24 +64,38 @@ class CameraServer:
 
     def __init__(self, camera: 'RobotCamera'):
         self.camera = camera
-        self.packets_queue: "Queue[RawViscaPacket]" = Queue(2)
+        self.packets_queue: "Queue[RawViscaPacket]" = Queue(8)
         self.started = False
 
     def process_incoming_packet(self) -> None:
-        """Processes the first packet in the queue (if not empty).
+        """Processes the packets in the queue (if not empty).
         
-        If the camera is busy then the method does nothing.
+        Consecutive pan tilt packets are skipped until the most recent one,
+        other packets are processed in order. The queue is no longer read
+        once the camera is busy, remaining packets are kept for the next call.
         It should be called periodically.
         """
-        if self.camera.is_busy:
-            return
+        camera = self.camera
+        pending_pan_tilt = None
+
+        while not camera.is_busy:
+            try:
+                packet = self.packets_queue.get(block=False)
+            except Empty:
+                break
+
+            if get_packet_signature(packet) == PAN_TILT_SIGNATURE:
+                pending_pan_tilt = packet
+                continue
+
+            if not pending_pan_tilt is None:
+                process_packet(camera, pending_pan_tilt)
+                pending_pan_tilt = None
 
-        try:
-            packet = self.packets_queue.get(block=False)
-        except Empty:
-            pass
-        else:
-            process_packet(self.camera, packet)
+            process_packet(camera, packet)
+
+        if not pending_pan_tilt is None:
+            process_packet(camera, pending_pan_tilt)
 
     def start_receiver_thread(self, serial_port: str) -> None:
         """Starts a new thread for receiving packets.
@@ -125,29 +157,18 @@ def handle_pan_tilt_packet(camera: 'RobotCamera', packet: 'RawViscaPacket') -> b
         logger.warning(f'Invalid pan tilt packet, expected size of 7, got {len(packet_data)}')
         return False
 
-    try:
-        pan_speed = SPEEDS_LOOKUP[packet_data[3]]
-        tilt_speed = SPEEDS_LOOKUP[packet_data[4]]
-    except IndexError:
-        pan_speed = 0
-        tilt_speed = 0
-
-    pan_direction = packet_data[5]
-    tilt_direction = packet_data[6]
-
-    if pan_direction == 1:
-        camera.pan_speed = pan_speed
-    elif pan_direction == 2:
-        camera.pan_speed = -pan_speed
-    else:
-        camera.pan_speed = 0
+    pan_index = packet_data[3]
+    tilt_index = packet_data[4]
 
-    if tilt_direction == 1:
-        camera.tilt_speed  = tilt_speed
-    elif tilt_direction == 2:
-        camera.tilt_speed = -tilt_speed
+    if pan_index < len(SPEEDS_LOOKUP_RAD) and tilt_index < len(SPEEDS_LOOKUP_RAD):
+        pan_speed = SPEEDS_LOOKUP_RAD[pan_index]
+        tilt_speed = SPEEDS_LOOKUP_RAD[tilt_index]
     else:
-        camera.tilt_speed = 0
+        pan_speed = 0.0
+        tilt_speed = 0.0
+
+    camera.pan_speed = pan_speed * DIRECTION_SIGNS[packet_data[5]]
+    camera.tilt_speed = tilt_speed * DIRECTION_SIGNS[packet_data[6]]
 
     camera.drive()
 
@@ -176,19 +197,31 @@ def handle_zoom_packet(camera: 'RobotCamera', packet: 'RawViscaPacket') -> bool:
         logger.warning(f'Expecting zoom speed between 1 and 7, got {speed}')
         return False
 
-    if direction == 0:
-        camera.zoom_speed = 0
-    elif direction == 2:
-        camera.zoom_speed = -speed
-    elif direction == 3:
-        camera.zoom_speed = speed
-    else:
+    sign = ZOOM_SIGNS[direction]
+
+    if sign is None:
         logger.warning(f'Unknown zoom direction {direction}')
         return False
 
+    camera.zoom_speed = sign * speed
+
     return True
 
 
+def get_packet_signature(packet: 'RawViscaPacket') -> int:
+    """Gets the signature of a packet, its first 3 bytes packed into an integer.
+
+    :param packet: a packet
+    :returns: the signature or -1 if the packet is too short
+    """
+    packet_data = packet.data
+
+    if len(packet_data) < 3:
+        return -1
+
+    return (packet_data[0] << 16) | (packet_data[1] << 8) | packet_data[2]
+
+
 def process_packet(camera: 'RobotCamera', packet: 'RawViscaPacket') -> None:
     """Calls the corresponding handler for the given packet.
     
@@ -197,18 +230,28 @@ def process_packet(camera: 'RobotCamera', packet: 'RawViscaPacket') -> None:
     :param camera: instance of the camera to update
     :param packet: packet to handle
     """
-    packet_data = packet.data.tobytes()
-    for packet_signature, packet_handler in PACKET_SIGNATURES.items():
-        if packet_data.startswith(packet_signature):
-            packet_handler(camera, packet)
-            return
+    signature = get_packet_signature(packet)
+
+    # Pan tilt packets are the most frequent ones
+    if signature == PAN_TILT_SIGNATURE:
+        handle_pan_tilt_packet(camera, packet)
+        return
+
+    packet_handler = PACKET_SIGNATURES.get(signature)
+
+    if packet_handler is None:
+        logger.warning(f'Unknown packet {packet.data.tobytes()}')
+    else:
+        packet_handler(camera, packet)
 
-    logger.warning(f'Unknown packet {packet_data}')
 
+MEMORY_SIGNATURE = 0x01043f
+PAN_TILT_SIGNATURE = 0x010601
+ZOOM_SIGNATURE = 0x010407
 
-PACKET_SIGNATURES: Dict[bytes, Callable[['RobotCamera', 'RawViscaPacket'], bool]] = {
-    b'\x01\x04\x3f': handle_memory_packet,
-    b'\x01\x06\x01': handle_pan_tilt_packet,
-    b'\x01\x04\x07': handle_zoom_packet
+PACKET_SIGNATURES: Dict[int, Callable[['RobotCamera', 'RawViscaPacket'], bool]] = {
+    MEMORY_SIGNATURE: handle_memory_packet,
+    PAN_TILT_SIGNATURE: handle_pan_tilt_packet,
+    ZOOM_SIGNATURE: handle_zoom_packet
 }
-"""Association between the start of a packet with a handler"""
+"""Association between the first 3 bytes of a packet (as an integer) with a handler"""
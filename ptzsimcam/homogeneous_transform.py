@@ -3,6 +3,8 @@ import math
 
 import numpy as np
 
+_IDENTITY = np.identity(4)
+
 
 def rot_x(alpha):
     """Return the 4x4 homogeneous transform corresponding to a rotation of
@@ -10,7 +12,12 @@ def rot_x(alpha):
     """
     c = math.cos(alpha)
     s = math.sin(alpha)
-    return np.array([[1, 0, 0, 0], [0, c, -s, 0], [0, s, c, 0], [0, 0, 0, 1]])
+    T = _IDENTITY.copy()
+    T[1, 1] = c
+    T[1, 2] = -s
+    T[2, 1] = s
+    T[2, 2] = c
+    return T
 
 
 def rot_y(alpha):
@@ -19,7 +26,12 @@ def rot_y(alpha):
     """
     c = math.cos(alpha)
     s = math.sin(alpha)
-    return np.array([[c, 0, s, 0], [0, 1, 0, 0], [-s, 0, c, 0], [0, 0, 0, 1]])
+    T = _IDENTITY.copy()
+    T[0, 0] = c
+    T[0, 2] = s
+    T[2, 0] = -s
+    T[2, 2] = c
+    return T
 
 
 def rot_z(alpha):
@@ -28,16 +40,18 @@ def rot_z(alpha):
     """
     c = math.cos(alpha)
     s = math.sin(alpha)
-    return np.array([[c, -s, 0, 0], [s, c, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]])
+    T = _IDENTITY.copy()
+    T[0, 0] = c
+    T[0, 1] = -s
+    T[1, 0] = s
+    T[1, 1] = c
+    return T
 
 
 def translation(vec):
     """Return the 4x4 homogeneous transform corresponding to a translation of
     vec
     """
-    T = np.zeros(shape=(4, 4))
-    T[:3, :3] = np.identity(3)
+    T = _IDENTITY.copy()
     T[:3, 3] = vec
-    T[3, 3] = 1
     return T
-
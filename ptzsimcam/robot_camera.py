@@ -1,4 +1,5 @@
 """Defines a camera robot based on the EVI-D100 by Sony for pybullet."""
+import functools
 import math
 from dataclasses import dataclass
 from typing import Optional, Tuple, cast
@@ -6,8 +7,6 @@ from typing import Optional, Tuple, cast
 import numpy as np
 import pybullet as pb
 
-from ptzsimcam.homogeneous_transform import rot_x, rot_z, translation
-
 ZOOM_SPEEDS = [0, 1, 2, 5, 7, 10, 15, 20]
 """Association between a visca zoom speed (0, 7) and a zoom speed in degrees/s."""
 
@@ -51,33 +50,107 @@ class RobotCamera:
         self.projection_matrix = compute_projection_matrix(self.ZOOM_FOV_MAX)
         self.current_fov = self.ZOOM_FOV_MAX
 
-        self.first_join_base = translation(np.array([0.0, 0.25, 0.15]))
-        self.second_join_base = translation(np.array([0.0, 0.1, 0.4]))
-        self.camera_end = translation(np.array([0.0, 0.9/2, 0.0]))
+        # Translations before the first joint, between the joints and after the second joint
+        self.first_joint_offset = (0.0, 0.25, 0.15)
+        self.second_joint_offset = (0.0, 0.1, 0.4)
+        self.camera_end_offset = (0.0, 0.9/2, 0.0)
+
+        # Last base computed by get_base_from_camera and its joint values
+        self._base_joint_values: Optional[Tuple[float, float]] = None
+        self._base_from_camera = np.identity(4)
+
+        # Joint values and fov of the last rendered image
+        self._rendered_view: Optional[Tuple[Tuple[float, float], float]] = None
 
+        # Speeds in radians/s
         self.pan_speed = 0.0
         self.tilt_speed = 0.0
         self.zoom_speed = 0
 
+        # Arguments of the velocity control, reused by each drive command
+        # The velocities are the last ones sent if the joints are in velocity control
+        self._velocity_control = False
+        self._drive_velocities = [0.0, 0.0]
+        self._drive_forces = [0.2, 0.2]
+        self._drive_gains = [0.01, 0.01]
+
         # Recorded params, 6 available
         self.memories = [ParamsMemory(0.0, 0.0, self.ZOOM_FOV_MAX) for _ in range(6)]
         self.target_memory: Optional['ParamsMemory'] = None
 
     def drive(self) -> None:
-        """Moves the camera with the current pan and tilt speeds."""
+        """Moves the camera with the current pan and tilt speeds.
+
+        Nothing is sent to pybullet if the speeds did not change.
+        """
+        velocities = self._drive_velocities
+        pan_speed = self.pan_speed
+        tilt_speed = self.tilt_speed
+
+        if self._velocity_control and velocities[0] == pan_speed and velocities[1] == tilt_speed:
+            return
+
+        self._velocity_control = True
+        velocities[0] = pan_speed
+        velocities[1] = tilt_speed
+
         pb.setJointMotorControlArray(
             self.main_link, self.joints,
-            pb.VELOCITY_CONTROL, targetVelocities=[math.radians(self.pan_speed), math.radians(self.tilt_speed)], 
-            forces=[0.2, 0.2], velocityGains=[0.01, 0.01]
+            pb.VELOCITY_CONTROL, targetVelocities=velocities,
+            forces=self._drive_forces, velocityGains=self._drive_gains
         )
 
     def get_base_from_camera(self) -> np.ndarray:
-        """Gets the base position at the end of the robot."""
-        joint_states = [x[0] for x in pb.getJointStates(self.main_link, self.joints)]
+        """Gets the base position at the end of the robot.
+
+        The base is only computed again when the joints have moved,
+        the returned matrix must not be modified.
+        """
+        joint_values = self.read_joints()
+
+        if joint_values != self._base_joint_values:
+            self._base_joint_values = joint_values
+            self.compose_base(joint_values[0], joint_values[1], self._base_from_camera)
 
-        return self.first_join_base.dot(
-            rot_z(joint_states[0])).dot(self.second_join_base).dot(
-                rot_x(joint_states[1])).dot(self.camera_end)
+        return self._base_from_camera
+
+    def compose_base(self, pan: float, tilt: float, out: np.ndarray) -> None:
+        """Computes the base at the end of the robot for the given joint values.
+
+        The chain first translation, rotation around z (pan), second translation,
+        rotation around x (tilt) and camera end translation is expanded by hand :
+        only the upper 3x4 part of the matrix is written.
+
+        :param pan: value of the pan joint
+        :param tilt: value of the tilt joint
+        :param out: 4x4 homogeneous matrix receiving the result
+        """
+        cp = math.cos(pan)
+        sp = math.sin(pan)
+        ct = math.cos(tilt)
+        st = math.sin(tilt)
+
+        t1x, t1y, t1z = self.first_joint_offset
+        t2x, t2y, t2z = self.second_joint_offset
+        tex, tey, tez = self.camera_end_offset
+
+        # Position of the camera end in the frame of the first joint
+        qx = t2x + tex
+        qy = t2y + ct * tey - st * tez
+        qz = t2z + st * tey + ct * tez
+
+        out[0, 0] = cp
+        out[0, 1] = -sp * ct
+        out[0, 2] = sp * st
+        out[0, 3] = t1x + cp * qx - sp * qy
+        out[1, 0] = sp
+        out[1, 1] = cp * ct
+        out[1, 2] = -cp * st
+        out[1, 3] = t1y + sp * qx + cp * qy
+        out[2, 0] = 0.0
+        out[2, 1] = st
+        out[2, 2] = ct
+        out[2, 3] = t1z + qz
 
     @property
     def is_busy(self) -> bool:
@@ -117,6 +190,7 @@ class RobotCamera:
         else:
             self.zoom_speed = 0
 
+        self._velocity_control = False
         pb.setJointMotorControlArray(
             self.main_link, self.joints, 
             pb.POSITION_CONTROL, targetPositions=self.target_memory.joints,
@@ -127,8 +201,16 @@ class RobotCamera:
         """Renders an image using the simulated camera of pybullet.
         
         The camera will be placed at the end of the robot.
+        Nothing is rendered if the camera has not moved nor zoomed
+        since the last image.
         """
         world_from_tool = self.get_base_from_camera()
+
+        view = (self._base_joint_values, self.current_fov)
+        if view == self._rendered_view:
+            return
+
+        self._rendered_view = view
         tool_pos = world_from_tool[:3, 3]
 
         direction = world_from_tool[:3, :3].dot(self.camera_direction)
@@ -159,10 +241,15 @@ class RobotCamera:
         """
         self.render_image()
 
-        if not self.target_memory is None:
-            joints = self.read_joints()
+        target_memory = self.target_memory
 
-            if np.allclose(self.target_memory.joints, joints, atol=1e-1) and self.current_fov == self.target_memory.zoom_fov:
+        if not target_memory is None:
+            # Joints have just been read for rendering the image
+            pan_joint_value, tilt_joint_value = cast(Tuple[float, float], self._base_joint_values)
+
+            if (abs(target_memory.pan_joint_value - pan_joint_value) <= 1e-1
+                    and abs(target_memory.tilt_joint_value - tilt_joint_value) <= 1e-1
+                    and self.current_fov == target_memory.zoom_fov):
                 self.target_memory = None
 
         zoom_amount = ZOOM_SPEEDS[abs(self.zoom_speed)]
@@ -177,9 +264,21 @@ class RobotCamera:
             new_fov = self.ZOOM_FOV_MAX
 
         if new_fov != self.current_fov:
-            self.projection_matrix = compute_projection_matrix(new_fov)
+            self.projection_matrix = compute_cached_projection_matrix(round(new_fov * 10))
             self.current_fov = new_fov
 
 
 def compute_projection_matrix(fov):
     return pb.computeProjectionMatrixFOV(fov=fov, aspect=1.0, nearVal=0.1, farVal=100)
+
+
+@functools.lru_cache(maxsize=1024)
+def compute_cached_projection_matrix(fov_tenths: int):
+    """Computes a projection matrix for a fov quantized to 0.1 degree.
+
+    Matrices are cached : zooming through the same range does not
+    compute them again.
+
+    :param fov_tenths: fov in tenths of degree
+    """
+    return compute_projection_matrix(fov_tenths / 10)
@@ -5,10 +5,14 @@ import time
 
 import pybullet as pb
 
-from ptzsimcam.camera_server import SPEEDS_LOOKUP, CameraServer
+from ptzsimcam.camera_server import SPEEDS_LOOKUP_RAD, CameraServer
 from ptzsimcam.robot_camera import RobotCamera
 
 
+FRAME_PERIOD_NS = 1_000_000_000 // 240
+"""Duration of a simulation step in nanoseconds, pybullet runs at 240Hz by default."""
+
+
 class Simulation:
 
     """A pybullet simulation for controlling a camera."""
@@ -26,59 +30,81 @@ class Simulation:
         self.tilt_vel_slider = pb.addUserDebugParameter('TILT vel', -0x17, 0x17, startValue=0)
         self.zoom_vel_slider = pb.addUserDebugParameter('ZOOM vel', -7, 7, startValue=0)
 
+        # Slider values read by the last call of gui_controller
+        self.last_slider_values = (0.0, 0.0, 0.0)
+
     def gui_controller(self) -> None:
-        """Reads slider values and sends driver packet to the camera.s"""
+        """Reads slider values and sends driver packet to the camera.
+
+        The camera is not updated if the sliders did not move.
+        """
         pan_vel = pb.readUserDebugParameter(self.pan_vel_slider)
         tilt_vel = pb.readUserDebugParameter(self.tilt_vel_slider)
         zoom_vel = pb.readUserDebugParameter(self.zoom_vel_slider)
 
-        if pan_vel < 0:
-            pan_dir = 1
-        elif pan_vel > 0:
-            pan_dir = -1
-        else:
-            pan_dir = 0
-
-        if tilt_vel < 0:
-            tilt_dir = 1
-        elif tilt_vel > 0:
-            tilt_dir = -1
-        else:
-            tilt_dir = 0
-
-        if zoom_vel < 0:
-            zoom_dir = 1
-        elif zoom_vel > 0:
-            zoom_dir = -1
-        else:
-            zoom_dir = 0
-
-        self.camera.pan_speed = SPEEDS_LOOKUP[abs(int(pan_vel))] * pan_dir
-        self.camera.tilt_speed = SPEEDS_LOOKUP[abs(int(tilt_vel))] * tilt_dir
+        slider_values = (pan_vel, tilt_vel, zoom_vel)
+        if slider_values == self.last_slider_values:
+            return
+
+        self.last_slider_values = slider_values
+
+        pan = int(pan_vel)
+        tilt = int(tilt_vel)
+        zoom = int(zoom_vel)
+
+        # Speeds are clamped in case a slider returns a value slightly out of its range
+        pan_speed = min(abs(pan), 0x18)
+        tilt_speed = min(abs(tilt), 0x17)
+        zoom_speed = min(abs(zoom), 7)
+
+        # Sliders are inverted : a negative value gives a positive speed
+        self.camera.pan_speed = SPEEDS_LOOKUP_RAD[pan_speed] * ((pan < 0) - (pan > 0))
+        self.camera.tilt_speed = SPEEDS_LOOKUP_RAD[tilt_speed] * ((tilt < 0) - (tilt > 0))
         self.camera.drive()
 
-        self.camera.zoom_speed = abs(int(zoom_vel)) * zoom_dir
+        self.camera.zoom_speed = zoom_speed * ((zoom < 0) - (zoom > 0))
 
     def run(self):
         """Simulation loop."""
         frame_count = 0
 
-        while True:
-            if self.enable_gui_control:
-                self.gui_controller()
+        # Functions called at each frame are bound once
+        gui_controller = self.gui_controller if self.enable_gui_control else None
+        process_incoming_packet = self.camera_server.process_incoming_packet
+        update_camera = self.camera.update
+        step_simulation = pb.stepSimulation
+        sleep = time.sleep
+        monotonic_ns = time.monotonic_ns
+
+        next_frame = monotonic_ns() + FRAME_PERIOD_NS
 
-            self.camera_server.process_incoming_packet()
+        while True:
+            process_incoming_packet()
 
             # By default the simulation runs at 240Hz
             # For the camera, 30Hz is enough. 240 / 30 = 8
-            # We render an image every 8 frames.
-            if frame_count == 8:
-                self.camera.update(1.0/30)
-                frame_count = 0
-
-            pb.stepSimulation()
-            frame_count += 1
-            time.sleep(1.0/240)
+            # We read sliders and render an image every 8 frames.
+            if frame_count == 0:
+                if not gui_controller is None:
+                    gui_controller()
+
+                update_camera(1.0/30)
+
+            step_simulation()
+            frame_count = (frame_count + 1) & 7
+
+            # Sleeps until the next frame deadline, the time spent in the
+            # frame is not added to the period
+            remaining = next_frame - monotonic_ns()
+
+            if remaining < -FRAME_PERIOD_NS:
+                # More than one frame late, the missed frames are dropped
+                next_frame = monotonic_ns() + FRAME_PERIOD_NS
+            else:
+                if remaining > 0:
+                    sleep(remaining / 1e9)
+
+                next_frame += FRAME_PERIOD_NS
 
 
 def main() -> None:
@@ -1,10 +1,11 @@
+import os
+import subprocess
+import sys
 from itertools import product
 from unittest import TestCase
-from unittest.mock import MagicMock, patch
 
 from ptzpicocam.camera import (CameraAPI, MemoryAction, PanDirection,
                                TiltDirection, ZoomDirection)
-from ptzpicocam.visca import RawViscaPacket
 
 
 class TestCreateDrivePacket(TestCase):
@@ -24,9 +25,8 @@ class TestCreateDrivePacket(TestCase):
         with self.assertRaises(ValueError):
             CameraAPI.create_pan_tilt_packet(buffer, 0, PanDirection.LEFT, 24, TiltDirection.UP)
 
-    @patch.object(RawViscaPacket, 'write_data', MagicMock(return_value=False))
     def test_create_pan_tilt_packet_Should_RaiseValueError_When_GivenTooSmallBuffer(self):
-        buffer = bytearray(2)
+        buffer = bytearray(8)
 
         with self.assertRaises(RuntimeError):
             CameraAPI.create_pan_tilt_packet(buffer, 1, PanDirection.LEFT, 1, TiltDirection.UP)
@@ -39,15 +39,30 @@ class TestCreateDrivePacket(TestCase):
             buffer = bytearray(20)
             packet = CameraAPI.create_pan_tilt_packet(buffer, pan_speed, pan_direction, tilt_speed, tilt_direction)
 
-            data = packet.data.tobytes()
-            expected = bytearray(b'\x01\x06\x01')
+            data = packet.tobytes()
+            expected = bytearray(b'\x81\x01\x06\x01')
             expected.append(pan_speed)
             expected.append(tilt_speed)
             expected.append(pan_direction)
             expected.append(tilt_direction)
+            expected.append(0xff)
 
             self.assertEqual(expected, data)
 
+    def test_create_pan_tilt_packet_Should_ClampSpeeds_When_NotInDebug(self):
+        # The speed checks are removed by -O, the packet is created by another interpreter
+        script = (
+            'from ptzpicocam.camera import CameraAPI\n'
+            'for speed in (-1, 0, 25, 256):\n'
+            '    packet = CameraAPI.create_pan_tilt_packet(bytearray(9), speed, 1, speed, 1)\n'
+            '    print(packet[4], packet[5])\n'
+        )
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        output = subprocess.check_output([sys.executable, '-O', '-c', script], cwd=root, text=True)
+
+        speeds = [tuple(int(value) for value in line.split()) for line in output.splitlines()]
+        self.assertEqual([(1, 1), (1, 1), (24, 23), (24, 23)], speeds)
+
 
 class TestCreateMemoryPacket(TestCase):
 
@@ -60,9 +75,8 @@ class TestCreateMemoryPacket(TestCase):
         with self.assertRaises(ValueError):
             CameraAPI.create_memory_packet(buffer, 6, MemoryAction.RECALL)
 
-    @patch.object(RawViscaPacket, 'write_data', MagicMock(return_value=False))
     def test_create_memory_packet_Should_RaiseValueError_When_GivenTooSmallBuffer(self):
-        buffer = bytearray(3)
+        buffer = bytearray(6)
 
         with self.assertRaises(RuntimeError):
             CameraAPI.create_memory_packet(buffer, 5, MemoryAction.RECALL)
@@ -72,29 +86,29 @@ class TestCreateMemoryPacket(TestCase):
             buffer = bytearray(20)
             packet = CameraAPI.create_memory_packet(buffer, position_index, memory_action)
 
-            data = packet.data.tobytes()
+            data = packet.tobytes()
 
-            expected = bytearray(b'\x01\x04\x3f')
+            expected = bytearray(b'\x81\x01\x04\x3f')
             expected.append(memory_action)
             expected.append(position_index)
+            expected.append(0xff)
 
             self.assertEqual(expected, data)
 
 
 class TestCreateZoomPacket(TestCase):
 
-    @patch.object(RawViscaPacket, 'write_data', MagicMock(return_value=False))
     def test_create_stop_zoom_packet_Should_RaiseRuntimeError_When_GivenTooSmallBuffer(self):
-        buffer = bytearray(2)
+        buffer = bytearray(5)
 
         with self.assertRaises(RuntimeError):
             CameraAPI.create_stop_zoom_packet(buffer)
 
     def test_create_stop_zoom_packet(self):
-        expected = b'\x01\x04\x07\x00'
+        expected = b'\x81\x01\x04\x07\x00\xff'
         packet = CameraAPI.create_stop_zoom_packet(bytearray(10))
 
-        self.assertEqual(expected, packet.data.tobytes())
+        self.assertEqual(expected, packet.tobytes())
 
     def test_create_zoom_packet_Should_RaiseValueError_When_GivenInvalidSpeed(self):
         buffer = bytearray(10)
@@ -105,9 +119,8 @@ class TestCreateZoomPacket(TestCase):
         with self.assertRaises(ValueError):
             CameraAPI.create_zoom_packet(buffer, 8, ZoomDirection.WIDE)
 
-    @patch.object(RawViscaPacket, 'write_data', MagicMock(return_value=False))
     def test_create_zoom_packet_Should_RaiseRuntimeError_When_GivenTooSmallBuffer(self):
-        buffer = bytearray(10)
+        buffer = bytearray(5)
 
         with self.assertRaises(RuntimeError):
             CameraAPI.create_zoom_packet(buffer, 3, ZoomDirection.WIDE)
@@ -118,8 +131,9 @@ class TestCreateZoomPacket(TestCase):
         for zoom_speed, zoom_direction in product(speeds, ZoomDirection):
             packet = CameraAPI.create_zoom_packet(bytearray(10), zoom_speed, zoom_direction)
 
-            data = packet.data.tobytes()
-            expected = bytearray(b'\x01\x04\x07')
+            data = packet.tobytes()
+            expected = bytearray(b'\x81\x01\x04\x07')
             expected.append(zoom_direction << 4 | zoom_speed)
+            expected.append(0xff)
 
             self.assertEqual(expected, data)
@@ -1,14 +1,17 @@
 import sys
 import time
+from array import array
 from unittest import TestCase
 from unittest.mock import MagicMock
 
 from ptzpicocam.camera import PanDirection, TiltDirection, ZoomDirection
 
 sys.modules['machine'] = MagicMock()
-from ptzpicocam.pico import (Button, ButtonPressType, Camera, Joystick,
-                             convert_joyx_to_pan, convert_joyy_to_tilt,
-                             convert_zoom)
+sys.modules['rp2'] = MagicMock()
+from ptzpicocam.pico import (STATE_PAN_DIR, STATE_PAN_SPEED, STATE_TILT_DIR,
+                             STATE_TILT_SPEED, STATE_ZOOM_DIR, STATE_ZOOM_SPEED,
+                             Button, ButtonPressType, Camera, Joystick,
+                             compute_slope, convert_all)
 
 
 class TestButton(TestCase):
@@ -16,6 +19,7 @@ class TestButton(TestCase):
     def setUp(self) -> None:
         self.time_mock = MagicMock()
         time.ticks_ms = self.time_mock
+        time.ticks_diff = lambda t1, t2: t1 - t2
 
     def test_isr_Should_NotUpdateFlag_When_ReboundDetected(self):
         self.time_mock.return_value = 0
@@ -82,97 +86,136 @@ class TestJoystick(TestCase):
             self.assertEqual(49, joystick.left_limit)
             self.assertEqual(49, joystick.right_limit)
 
+    def test_compute_slope(self):
+        with self.subTest('Should reach the maximal speed at the end of the range'):
+            slope = compute_slope(0x18, 50)
+            self.assertEqual(0x17, (50 * slope) >> 16)
+            self.assertEqual(0x16, (48 * slope) >> 16)
 
-class TestJoyXConversion(TestCase):
+        with self.subTest('Should return 0 when given an empty range'):
+            self.assertEqual(0, compute_slope(0x18, 0))
+
+
+class TestJoystickConversion(TestCase):
 
     def setUp(self) -> None:
         self.joystick = Joystick(0, 100, 0)
-        self.joystick.left_limit = 50
-        self.joystick.right_limit = 50
+        self.joystick.compute_bounds()
+        self.values = array('H', (50, 50, 50, 0))
 
-    def test_convert_joyx_to_pan(self):
+    def test_convert_joystick_pan(self):
         camera = Camera()
 
         with self.subTest('When joyx is in the middle'):
-            self.joystick.x = 50
-            in_deadzone = convert_joyx_to_pan(self.joystick, camera)
+            self.values[0] = 50
+            convert_all(self.values, self.joystick.bounds, camera.state)
 
-            self.assertTrue(in_deadzone)
-            self.assertEqual(1, camera.pan_speed)
-            self.assertEqual(PanDirection.NONE, camera.pan_dir)
+            self.assertEqual(1, camera.state[STATE_PAN_SPEED])
+            self.assertEqual(PanDirection.NONE, camera.state[STATE_PAN_DIR])
 
         with self.subTest('When joyx is in the left side'):
-            self.joystick.x = 35
-            in_deadzone = convert_joyx_to_pan(self.joystick, camera)
+            self.values[0] = 35
+            convert_all(self.values, self.joystick.bounds, camera.state)
 
-            self.assertFalse(in_deadzone)
-            self.assertLess(0, camera.pan_speed)
-            self.assertGreater(0x24, camera.pan_speed)
-            self.assertEqual(PanDirection.RIGHT, camera.pan_dir)
+            self.assertLess(0, camera.state[STATE_PAN_SPEED])
+            self.assertGreater(0x24, camera.state[STATE_PAN_SPEED])
+            self.assertEqual(PanDirection.RIGHT, camera.state[STATE_PAN_DIR])
 
         with self.subTest('When joyy is in the right side'):
-            self.joystick.x = 81
-            in_deadzone = convert_joyx_to_pan(self.joystick, camera)
+            self.values[0] = 81
+            convert_all(self.values, self.joystick.bounds, camera.state)
+
+            self.assertLess(0, camera.state[STATE_PAN_SPEED])
+            self.assertGreater(0x24, camera.state[STATE_PAN_SPEED])
+            self.assertEqual(PanDirection.LEFT, camera.state[STATE_PAN_DIR])
+
+        with self.subTest('When joyx is at the limits'):
+            self.values[0] = 0
+            convert_all(self.values, self.joystick.bounds, camera.state)
+            self.assertEqual(0x18, camera.state[STATE_PAN_SPEED])
 
-            self.assertFalse(in_deadzone)
-            self.assertLess(0, camera.pan_speed)
-            self.assertGreater(0x24, camera.pan_speed)
-            self.assertEqual(PanDirection.LEFT, camera.pan_dir)
+            self.values[0] = 100
+            convert_all(self.values, self.joystick.bounds, camera.state)
+            self.assertEqual(0x18, camera.state[STATE_PAN_SPEED])
 
-    def test_convert_joyy_to_pan(self):
+    def test_convert_joystick_tilt(self):
         camera = Camera()
 
         with self.subTest('When joyy is in the middle'):
-            self.joystick.y = 50
-            in_deadzone = convert_joyy_to_tilt(self.joystick, camera)
+            self.values[1] = 50
+            convert_all(self.values, self.joystick.bounds, camera.state)
 
-            self.assertTrue(in_deadzone)
-            self.assertEqual(1, camera.tilt_speed)
-            self.assertEqual(TiltDirection.NONE, camera.tilt_dir)
+            self.assertEqual(1, camera.state[STATE_TILT_SPEED])
+            self.assertEqual(TiltDirection.NONE, camera.state[STATE_TILT_DIR])
 
         with self.subTest('When joyy is in the left side'):
-            self.joystick.y = 35
-            in_deadzone = convert_joyy_to_tilt(self.joystick, camera)
+            self.values[1] = 35
+            convert_all(self.values, self.joystick.bounds, camera.state)
 
-            self.assertFalse(in_deadzone)
-            self.assertLess(0, camera.tilt_speed)
-            self.assertGreater(0x23, camera.tilt_speed)
-            self.assertEqual(TiltDirection.UP, camera.tilt_dir)
+            self.assertLess(0, camera.state[STATE_TILT_SPEED])
+            self.assertGreater(0x23, camera.state[STATE_TILT_SPEED])
+            self.assertEqual(TiltDirection.UP, camera.state[STATE_TILT_DIR])
 
         with self.subTest('When joyy is in the right side'):
-            self.joystick.y = 81
-            in_deadzone = convert_joyy_to_tilt(self.joystick, camera)
+            self.values[1] = 81
+            convert_all(self.values, self.joystick.bounds, camera.state)
 
-            self.assertFalse(in_deadzone)
-            self.assertLess(0, camera.tilt_speed)
-            self.assertGreater(0x23, camera.tilt_speed)
-            self.assertEqual(TiltDirection.DOWN, camera.tilt_dir)
+            self.assertLess(0, camera.state[STATE_TILT_SPEED])
+            self.assertGreater(0x23, camera.state[STATE_TILT_SPEED])
+            self.assertEqual(TiltDirection.DOWN, camera.state[STATE_TILT_DIR])
 
-    def test_convert_zoom(self):
+        with self.subTest('When joyy is at the limits'):
+            self.values[1] = 0
+            convert_all(self.values, self.joystick.bounds, camera.state)
+            self.assertEqual(0x17, camera.state[STATE_TILT_SPEED])
+
+            self.values[1] = 100
+            convert_all(self.values, self.joystick.bounds, camera.state)
+            self.assertEqual(0x17, camera.state[STATE_TILT_SPEED])
+
+    def test_convert_joystick_zoom(self):
         camera = Camera()
 
         with self.subTest('When zoom is in the middle'):
-            self.joystick.zoom = 50
-            in_deadzone = convert_zoom(self.joystick, camera)
+            self.values[2] = 50
+            convert_all(self.values, self.joystick.bounds, camera.state)
 
-            self.assertTrue(in_deadzone)
-            self.assertEqual(1, camera.zoom_speed)
-            self.assertEqual(ZoomDirection.NONE, camera.zoom_dir)
+            self.assertEqual(1, camera.state[STATE_ZOOM_SPEED])
+            self.assertEqual(ZoomDirection.NONE, camera.state[STATE_ZOOM_DIR])
 
         with self.subTest('When zoom is in the left side'):
-            self.joystick.zoom = 35
-            in_deadzone = convert_zoom(self.joystick, camera)
+            self.values[2] = 35
+            convert_all(self.values, self.joystick.bounds, camera.state)
 
-            self.assertFalse(in_deadzone)
-            self.assertLess(0, camera.zoom_speed)
-            self.assertGreater(0x23, camera.zoom_speed)
-            self.assertEqual(ZoomDirection.WIDE, camera.zoom_dir)
+            self.assertLess(0, camera.state[STATE_ZOOM_SPEED])
+            self.assertGreater(0x23, camera.state[STATE_ZOOM_SPEED])
+            self.assertEqual(ZoomDirection.WIDE, camera.state[STATE_ZOOM_DIR])
 
         with self.subTest('When zoom is in the right side'):
-            self.joystick.zoom = 81
-            in_deadzone = convert_zoom(self.joystick, camera)
+            self.values[2] = 81
+            convert_all(self.values, self.joystick.bounds, camera.state)
+
+            self.assertLess(0, camera.state[STATE_ZOOM_SPEED])
+            self.assertGreater(0x23, camera.state[STATE_ZOOM_SPEED])
+            self.assertEqual(ZoomDirection.TELE, camera.state[STATE_ZOOM_DIR])
+
+        with self.subTest('When zoom is at the limits'):
+            self.values[2] = 0
+            convert_all(self.values, self.joystick.bounds, camera.state)
+            self.assertEqual(7, camera.state[STATE_ZOOM_SPEED])
+
+            self.values[2] = 100
+            convert_all(self.values, self.joystick.bounds, camera.state)
+            self.assertEqual(7, camera.state[STATE_ZOOM_SPEED])
+
+    def test_convert_all_returns_pan_tilt_state(self):
+        camera = Camera()
+
+        state = convert_all(self.values, self.joystick.bounds, camera.state)
+        self.assertEqual((1 << 24) | (1 << 16) | (PanDirection.NONE << 8) | TiltDirection.NONE, state)
+
+        self.values[2] = 0
+        self.assertEqual(state, convert_all(self.values, self.joystick.bounds, camera.state))
 
-            self.assertFalse(in_deadzone)
-            self.assertLess(0, camera.zoom_speed)
-            self.assertGreater(0x23, camera.zoom_speed)
-            self.assertEqual(ZoomDirection.TELE, camera.zoom_dir)
+        self.values[0] = 0
+        self.assertNotEqual(state, convert_all(self.values, self.joystick.bounds, camera.state))
@@ -44,6 +44,26 @@ class TestRawViscaPacket(unittest.TestCase):
 
         self.assertEqual(b'\x81\x01\x02\x03\xff', result)
 
+    def test_encode_into(self):
+        packet = RawViscaPacket(1, 0, bytearray((0, 1, 2, 0)))
+        packet.data_size = 2
+        dst = bytearray(8)
+
+        offset = packet.encode_into(dst, 0)
+        self.assertEqual(4, offset)
+
+        offset = packet.encode_into(dst, offset)
+        self.assertEqual(8, offset)
+        self.assertEqual(b'\x81\x01\x02\xff\x81\x01\x02\xff', dst)
+
+    def test_encode_into_Should_ReturnMinusOne_When_GivenTooSmallBuffer(self):
+        packet = RawViscaPacket(1, 0, bytearray((0, 1, 2, 0)))
+        packet.data_size = 2
+        dst = bytearray(5)
+
+        self.assertEqual(-1, packet.encode_into(dst, 2))
+        self.assertEqual(bytearray(5), dst)
+
     def test_write_data_Should_ReturnFalse_When_GivenTooSmallBuffer(self):
         buffer = bytearray(2)
         packet = RawViscaPacket(1, 0, buffer)
@@ -60,3 +80,69 @@ class TestRawViscaPacket(unittest.TestCase):
 
         self.assertTrue(packet.write_data(4))
         self.assertEqual(b'\x00\x02\x04\x00', buffer)
+
+    def test_decode_Should_ReturnNone_When_GivenTooSmallBuffer(self):
+        data = BytesIO(b'\x81\x01\x02\x03\xff')
+        buffer = bytearray(4)
+
+        self.assertIsNone(RawViscaPacket.decode(buffer, data))
+
+    def test_decode_Should_ReturnNone_When_StreamEnds(self):
+        with self.subTest('When the stream is empty'):
+            self.assertIsNone(RawViscaPacket.decode(bytearray(10), BytesIO(b'')))
+
+        with self.subTest('When the terminator is missing'):
+            self.assertIsNone(RawViscaPacket.decode(bytearray(10), BytesIO(b'\x81\x01\x02')))
+
+    def test_decode_into_Should_ResetPacket(self):
+        packet = RawViscaPacket(2, 3, bytearray(10))
+        packet.data_size = 5
+
+        self.assertTrue(packet.decode_into(BytesIO(b'\x81\x01\x02\xff')))
+        self.assertEqual(1, packet.receiver_addr)
+        self.assertEqual(0, packet.sender_addr)
+        self.assertEqual(b'\x01\x02', packet.data.tobytes())
+
+        self.assertTrue(packet.decode_into(BytesIO(b'\x90\xff')))
+        self.assertEqual(0, packet.receiver_addr)
+        self.assertEqual(1, packet.sender_addr)
+        self.assertEqual(0, packet.data_size)
+
+    def test_decode_bytes(self):
+        packet = RawViscaPacket(0, 0, bytearray(10))
+
+        self.assertTrue(packet.decode_bytes(b'\x81\x01\x02\xff'))
+        self.assertEqual(1, packet.receiver_addr)
+        self.assertEqual(0, packet.sender_addr)
+        self.assertEqual(b'\x01\x02', packet.data.tobytes())
+
+        self.assertTrue(packet.decode_bytes(b'\x90\xff'))
+        self.assertEqual(0, packet.receiver_addr)
+        self.assertEqual(1, packet.sender_addr)
+        self.assertEqual(0, len(packet.data))
+
+    def test_decode_bytes_Should_ReturnFalse_When_GivenInvalidPacket(self):
+        packet = RawViscaPacket(0, 0, bytearray(4))
+
+        with self.subTest('When the terminator is missing'):
+            self.assertFalse(packet.decode_bytes(b'\x81\x01\x02'))
+
+        with self.subTest('When the buffer is too small'):
+            self.assertFalse(packet.decode_bytes(b'\x81\x01\x02\x03\xff'))
+
+    def test_write_bytes(self):
+        buffer = bytearray(5)
+        packet = RawViscaPacket(1, 0, buffer)
+
+        self.assertTrue(packet.write_bytes(b'\x01\x02'))
+        self.assertTrue(packet.write_bytes(b'\x03'))
+        self.assertEqual(b'\x00\x01\x02\x03\x00', buffer)
+        self.assertEqual(3, packet.data_size)
+
+    def test_write_bytes_Should_ReturnFalse_When_GivenTooSmallBuffer(self):
+        buffer = bytearray(4)
+        packet = RawViscaPacket(1, 0, buffer)
+
+        self.assertFalse(packet.write_bytes(b'\x01\x02\x03'))
+        self.assertEqual(b'\x00\x00\x00\x00', buffer)
+        self.assertEqual(0, packet.data_size)
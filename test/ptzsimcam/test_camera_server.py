@@ -1,12 +1,42 @@
+import math
+from typing import List
 from unittest import TestCase
-from unittest.mock import MagicMock, PropertyMock
+from unittest.mock import MagicMock
 
 from ptzpicocam.camera import CameraAPI, PanDirection, TiltDirection
 from ptzpicocam.visca import RawViscaPacket
 
-from ptzsimcam.camera_server import (handle_memory_packet,
+from ptzsimcam.camera_server import (SPEEDS_LOOKUP, SPEEDS_LOOKUP_RAD,
+                                     CameraServer, handle_memory_packet,
                                      handle_pan_tilt_packet,
-                                     handle_zoom_packet)
+                                     handle_zoom_packet, process_packet)
+
+
+# (description, pan speed, pan direction, tilt speed, tilt direction, expected pan sign, expected tilt sign)
+PAN_TILT_CASES = (
+    ('Drive speed should be set to 0 when given invalid pan speed', 34, PanDirection.LEFT, 2, TiltDirection.UP, 0, 0),
+    ('Drive speed should be set to 0 when given invalid tilt speed', 1, PanDirection.LEFT, 34, TiltDirection.UP, 0, 0),
+    ('Pan speed should be set to 0 when given stop pan', 3, PanDirection.NONE, 1, TiltDirection.UP, 0, 1),
+    ('Tilt speed should be set to 0 when given stop tilt', 1, PanDirection.LEFT, 3, TiltDirection.NONE, 1, 0),
+    ('Speeds should be negative when given right and down', 1, PanDirection.RIGHT, 1, TiltDirection.DOWN, -1, -1),
+)
+
+# (description, direction, speed, expected zoom speed)
+ZOOM_CASES = (
+    ('Camera zoom speed should be set to 0 when packet contains stop', 0, 3, 0),
+    ('Camera zoom speed should be set to -3 when packet contains wide command', 2, 3, -3),
+    ('Camera zoom speed should be set to 3 when packet contains tele command', 3, 3, 3),
+)
+
+# (description, action, memory index, expected camera method)
+MEMORY_CASES = (
+    ('Should set memory when given set action', 1, 1, 'set_memory'),
+    ('Should recall memory when given recall action', 2, 1, 'recall_memory'),
+)
+
+
+def sign(value: float) -> int:
+    return (value > 0) - (value < 0)
 
 
 def create_packet(data: bytes) -> 'RawViscaPacket':
@@ -16,6 +46,50 @@ def create_packet(data: bytes) -> 'RawViscaPacket':
     return p
 
 
+def create_pan_tilt_packet(pan_speed: int, pan_direction: int, tilt_speed: int, tilt_direction: int) -> 'RawViscaPacket':
+    encoded = CameraAPI.create_pan_tilt_packet(bytearray(9), pan_speed, pan_direction, tilt_speed, tilt_direction)
+
+    return create_packet(encoded[1:-1].tobytes())
+
+
+class RecordingCamera:
+
+    """Camera stub recording the speeds set by the handlers."""
+
+    def __init__(self) -> None:
+        self.pan_speed_calls: List[float] = []
+        self.tilt_speed_calls: List[float] = []
+        self.zoom_speed_calls: List[int] = []
+        self.drive_calls = 0
+
+    @property
+    def pan_speed(self) -> float:
+        return self.pan_speed_calls[-1]
+
+    @pan_speed.setter
+    def pan_speed(self, value: float) -> None:
+        self.pan_speed_calls.append(value)
+
+    @property
+    def tilt_speed(self) -> float:
+        return self.tilt_speed_calls[-1]
+
+    @tilt_speed.setter
+    def tilt_speed(self, value: float) -> None:
+        self.tilt_speed_calls.append(value)
+
+    @property
+    def zoom_speed(self) -> int:
+        return self.zoom_speed_calls[-1]
+
+    @zoom_speed.setter
+    def zoom_speed(self, value: int) -> None:
+        self.zoom_speed_calls.append(value)
+
+    def drive(self) -> None:
+        self.drive_calls += 1
+
+
 class TestHandleMemoryPacket(TestCase):
 
     def create_memory_packet(self, action: int, position_index: int) -> 'RawViscaPacket':
@@ -53,17 +127,12 @@ class TestHandleMemoryPacket(TestCase):
     def test_handle_memory_packet(self):
         camera = MagicMock()
 
-        with self.subTest('Should set memory when given set action'):
-            packet = self.create_memory_packet(1, 1)
-            handle_memory_packet(camera, packet)
-
-            camera.set_memory.assert_called_with(1)
+        for description, action, memory_index, method_name in MEMORY_CASES:
+            with self.subTest(description):
+                packet = self.create_memory_packet(action, memory_index)
+                handle_memory_packet(camera, packet)
 
-        with self.subTest('Should recall memory when given recall action'):
-            packet = self.create_memory_packet(2, 1)
-            handle_memory_packet(camera, packet)
-
-            camera.recall_memory.assert_called_with(1)
+                getattr(camera, method_name).assert_called_with(memory_index)
 
 
 class TestHandlePanTiltPacket(TestCase):
@@ -78,58 +147,37 @@ class TestHandlePanTiltPacket(TestCase):
         self.assertFalse(result)
 
     def test_handle_pan_tilt_packet_Should_ReturnTrue_When_GivenValidPacket(self):
-        packet = CameraAPI.create_pan_tilt_packet(bytearray(20), 1, PanDirection.LEFT, 1, TiltDirection.UP)
+        packet = create_pan_tilt_packet(1, PanDirection.LEFT, 1, TiltDirection.UP)
         result = handle_pan_tilt_packet(MagicMock(), packet)
         self.assertTrue(result)
 
     def test_handle_pan_tilt_packet(self):
-        camera = MagicMock()
-        pan_speed = PropertyMock()
-        tilt_speed = PropertyMock()
-
-        type(camera).pan_speed = pan_speed
-        type(camera).tilt_speed = tilt_speed
-
-        with self.subTest('Drive speed should be set to 0 when given invalid pan speed'):
-            packet = CameraAPI.create_pan_tilt_packet(bytearray(20), 1, PanDirection.LEFT, 2, TiltDirection.UP)
-            # Forces invalid speed without triggering exception
-            packet.data[3] = 34
-            print(packet.buffer, packet.data.tobytes())
-            handle_pan_tilt_packet(camera, packet)
-
-            pan_speed.assert_called_with(0)
-            tilt_speed.assert_called_with(0)
-
-        with self.subTest('Drive speed should be set to 0 when given invalid tilt speed'):
-            packet = CameraAPI.create_pan_tilt_packet(bytearray(20), 1, PanDirection.LEFT, 1, TiltDirection.UP)
-            # Forces invalid speed without triggering exception
-            packet.data[4] = 34
-            handle_pan_tilt_packet(camera, packet)
-
-            pan_speed.assert_called_with(0)
-            tilt_speed.assert_called_with(0)
+        camera = RecordingCamera()
 
-        with self.subTest('Pan speed should be set to 0 when given stop pan'):
-            packet = CameraAPI.create_pan_tilt_packet(bytearray(20), 3, PanDirection.NONE, 1, TiltDirection.UP)
-            handle_pan_tilt_packet(camera, packet)
+        for description, pan_speed, pan_dir, tilt_speed, tilt_dir, expected_pan, expected_tilt in PAN_TILT_CASES:
+            with self.subTest(description):
+                packet = create_packet(bytes((0x01, 0x06, 0x01, pan_speed, tilt_speed, pan_dir, tilt_dir)))
+                self.assertTrue(handle_pan_tilt_packet(camera, packet))
 
-            pan_speed.assert_called_with(0)
-            tilt_speed.assert_called()
-            # Tilt speed must be set with a value greater than 0
-            self.assertEqual(1, len(tilt_speed.call_args.args))
-            self.assertLess(0, tilt_speed.call_args.args[0])
+                self.assertEqual(expected_pan, sign(camera.pan_speed))
+                self.assertEqual(expected_tilt, sign(camera.tilt_speed))
 
-        with self.subTest('Tilt speed should be set to 0 when given stop tilt'):
-            packet = CameraAPI.create_pan_tilt_packet(bytearray(20), 1, PanDirection.LEFT, 3, TiltDirection.NONE)
-            handle_pan_tilt_packet(camera, packet)
+        self.assertEqual(len(PAN_TILT_CASES), camera.drive_calls)
 
-            pan_speed.assert_called()
-            tilt_speed.assert_called_with(0)
+    def test_handle_pan_tilt_packet_Should_SetSpeedsInRadians(self):
+        camera = RecordingCamera()
+        directions = ((PanDirection.LEFT, TiltDirection.UP, 1), (PanDirection.RIGHT, TiltDirection.DOWN, -1))
 
-            # Pan speed must be set with a value greater than 0
-            self.assertEqual(1, len(pan_speed.call_args.args))
-            self.assertLess(0, pan_speed.call_args.args[0])
+        for pan_dir, tilt_dir, sign in directions:
+            for pan_speed, tilt_speed in ((1, 1), (12, 8), (24, 23)):
+                with self.subTest(pan_speed=pan_speed, tilt_speed=tilt_speed, sign=sign):
+                    packet = create_pan_tilt_packet(pan_speed, pan_dir, tilt_speed, tilt_dir)
+                    handle_pan_tilt_packet(camera, packet)
 
+                    self.assertAlmostEqual(math.radians(SPEEDS_LOOKUP[pan_speed]) * sign, camera.pan_speed_calls[-1])
+                    self.assertAlmostEqual(math.radians(SPEEDS_LOOKUP[tilt_speed]) * sign, camera.tilt_speed_calls[-1])
+                    self.assertAlmostEqual(SPEEDS_LOOKUP_RAD[pan_speed] * sign, camera.pan_speed_calls[-1])
+                    self.assertAlmostEqual(SPEEDS_LOOKUP_RAD[tilt_speed] * sign, camera.tilt_speed_calls[-1])
 
 
 class TestHandleZoomPacket(TestCase):
@@ -151,20 +199,18 @@ class TestHandleZoomPacket(TestCase):
         self.assertFalse(result)
 
     def test_handle_zoom_packet_Should_ReturnFalse_When_GivenInvalidData(self):
-        zoom_attr = PropertyMock()
-        camera = MagicMock()
-        type(camera).zoom_speed = zoom_attr
+        camera = RecordingCamera()
 
         packet_with_invalid_speed = self.create_zoom_packet(2, 0)
-        result = handle_zoom_packet(MagicMock(), packet_with_invalid_speed)
+        result = handle_zoom_packet(camera, packet_with_invalid_speed)
         self.assertFalse(result, 'Should return False when given invalid speed')
 
         packet_with_invalid_dir = self.create_zoom_packet(1, 4)
-        result = handle_zoom_packet(MagicMock(), packet_with_invalid_dir)
+        result = handle_zoom_packet(camera, packet_with_invalid_dir)
         self.assertFalse(result, 'Should return False when given invalid direction')
 
         # Zoom speed should not been updated
-        zoom_attr.assert_not_called()
+        self.assertEqual([], camera.zoom_speed_calls)
 
     def test_handle_zoom_packet_Should_ReturnTrue_When_GivenValidPacket(self):
         valid_packet = self.create_zoom_packet(2, 2)
@@ -172,16 +218,79 @@ class TestHandleZoomPacket(TestCase):
         self.assertTrue(result)
 
     def test_handle_zoom_packet_Should_UpdateZoomSpeed(self):
-        zoom_attr = PropertyMock()
+        camera = RecordingCamera()
+
+        for description, direction, speed, expected in ZOOM_CASES:
+            with self.subTest(description):
+                packet = self.create_zoom_packet(direction, speed)
+                handle_zoom_packet(camera, packet)
+
+                self.assertEqual(expected, camera.zoom_speed)
+
+
+class TestProcessPacket(TestCase):
+
+    def test_process_packet_Should_CallHandler_When_GivenKnownSignature(self):
+        camera = MagicMock()
+
+        process_packet(camera, create_packet(b'\x01\x04\x3f\x02\x01'))
+
+        camera.recall_memory.assert_called_with(1)
+
+    def test_process_packet_Should_IgnorePacket_When_GivenUnknownSignature(self):
+        camera = MagicMock()
+
+        with self.assertLogs('ptzsimcam.camera_server', level='WARNING'):
+            process_packet(camera, create_packet(b'\x01\x04\x00\x02\x01'))
+
+        with self.assertLogs('ptzsimcam.camera_server', level='WARNING'):
+            process_packet(camera, create_packet(b'\x01\x04'))
+
+        camera.assert_not_called()
+        self.assertEqual([], camera.method_calls)
+
+    def test_process_packet_Should_HandlePanTiltPacket(self):
         camera = MagicMock()
-        type(camera).zoom_speed = zoom_attr
 
-        with self.subTest('Camera zoom speed should be set to 0 when packet contains stop'):
-            packet = self.create_zoom_packet(0, 3)
-            handle_zoom_packet(camera, packet)
-            zoom_attr.assert_called_with(0)
+        process_packet(camera, create_pan_tilt_packet(1, PanDirection.LEFT, 1, TiltDirection.UP))
+
+        camera.drive.assert_called_once()
+
+
+class TestCameraServer(TestCase):
+
+    def setUp(self) -> None:
+        self.camera = MagicMock()
+        self.camera.is_busy = False
+        self.server = CameraServer(self.camera)
+
+    def test_process_incoming_packet_Should_OnlyProcessLatestPanTilt(self):
+        self.server.packets_queue.put(create_pan_tilt_packet(1, PanDirection.LEFT, 1, TiltDirection.UP))
+        self.server.packets_queue.put(create_pan_tilt_packet(2, PanDirection.RIGHT, 1, TiltDirection.UP))
+
+        self.server.process_incoming_packet()
+
+        self.camera.drive.assert_called_once()
+        self.assertGreater(0, self.camera.pan_speed)
+        self.assertTrue(self.server.packets_queue.empty())
+
+    def test_process_incoming_packet_Should_KeepOrder_When_GivenOtherPackets(self):
+        self.server.packets_queue.put(create_pan_tilt_packet(1, PanDirection.LEFT, 1, TiltDirection.UP))
+        self.server.packets_queue.put(create_packet(b'\x01\x04\x3f\x01\x02'))
+        self.server.packets_queue.put(create_pan_tilt_packet(2, PanDirection.NONE, 1, TiltDirection.UP))
+
+        self.server.process_incoming_packet()
+
+        self.assertEqual(['drive', 'set_memory', 'drive'], [c[0] for c in self.camera.method_calls])
+
+    def test_process_incoming_packet_Should_Stop_When_CameraIsBusy(self):
+        self.camera.recall_memory.side_effect = lambda i: setattr(self.camera, 'is_busy', True)
+
+        self.server.packets_queue.put(create_packet(b'\x01\x04\x3f\x02\x02'))
+        self.server.packets_queue.put(create_pan_tilt_packet(1, PanDirection.LEFT, 1, TiltDirection.UP))
+
+        self.server.process_incoming_packet()
 
-        with self.subTest('Camera zomm speed should be set to -3 when packet contains wide command'):
-            packet = self.create_zoom_packet(2, 3)
-            handle_zoom_packet(camera, packet)
-            zoom_attr.assert_called_with(-3)
+        self.camera.recall_memory.assert_called_once_with(2)
+        self.camera.drive.assert_not_called()
+        self.assertEqual(1, self.server.packets_queue.qsize())
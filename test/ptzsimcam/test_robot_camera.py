@@ -0,0 +1,82 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+import pybullet as pb
+
+from ptzsimcam.homogeneous_transform import rot_x, rot_z, translation
+from ptzsimcam.robot_camera import ParamsMemory, RobotCamera
+
+
+class TestRobotCamera(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.client = pb.connect(pb.DIRECT)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        pb.disconnect(cls.client)
+
+    def test_compose_base(self):
+        camera = RobotCamera(0, 1, 2)
+
+        for pan, tilt in ((0.0, 0.0), (0.3, -0.7), (2.1, 1.2)):
+            with self.subTest(pan=pan, tilt=tilt):
+                expected = translation(np.array(camera.first_joint_offset)).dot(
+                    rot_z(pan)).dot(translation(np.array(camera.second_joint_offset))).dot(
+                        rot_x(tilt)).dot(translation(np.array(camera.camera_end_offset)))
+
+                result = np.identity(4)
+                camera.compose_base(pan, tilt, result)
+
+                self.assertTrue(np.allclose(expected, result))
+
+    def test_render_image_Should_SkipRendering_When_CameraDidNotMove(self):
+        camera = RobotCamera(0, 1, 2)
+        camera.read_joints = lambda: (0.0, 0.0)
+
+        with patch('ptzsimcam.robot_camera.pb.getCameraImage') as get_camera_image:
+            camera.render_image()
+            camera.render_image()
+            get_camera_image.assert_called_once()
+
+            camera.read_joints = lambda: (0.1, 0.0)
+            camera.render_image()
+            self.assertEqual(2, get_camera_image.call_count)
+
+            camera.current_fov = RobotCamera.ZOOM_FOV_MIN
+            camera.render_image()
+            self.assertEqual(3, get_camera_image.call_count)
+
+    def test_drive_Should_SkipCommand_When_SpeedsDidNotChange(self):
+        camera = RobotCamera(0, 1, 2)
+
+        with patch('ptzsimcam.robot_camera.pb.setJointMotorControlArray') as set_joint_motor_control:
+            camera.drive()
+            camera.drive()
+            set_joint_motor_control.assert_called_once()
+
+            camera.pan_speed = 0.1
+            camera.drive()
+            self.assertEqual(2, set_joint_motor_control.call_count)
+
+            # Position control replaces the velocity control
+            camera.recall_memory(0)
+            camera.drive()
+            self.assertEqual(4, set_joint_motor_control.call_count)
+
+    def test_update_Should_ReleaseCamera_When_MemoryIsReached(self):
+        camera = RobotCamera(0, 1, 2)
+        camera.memories[1] = ParamsMemory(0.5, -0.2, RobotCamera.ZOOM_FOV_MAX)
+
+        with patch('ptzsimcam.robot_camera.pb'):
+            camera.recall_memory(1)
+
+            camera.read_joints = lambda: (0.3, -0.2)
+            camera.update(1.0/30)
+            self.assertTrue(camera.is_busy)
+
+            camera.read_joints = lambda: (0.45, -0.25)
+            camera.update(1.0/30)
+            self.assertFalse(camera.is_busy)
@@ -0,0 +1,38 @@
+import math
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from ptzsimcam.camera_server import SPEEDS_LOOKUP, SPEEDS_LOOKUP_RAD
+from ptzsimcam.sim import Simulation
+
+
+class TestGuiController(TestCase):
+
+    def create_simulation(self, pb: MagicMock) -> 'Simulation':
+        # Slider ids returned by addUserDebugParameter, in creation order
+        pb.addUserDebugParameter.side_effect = ['pan', 'tilt', 'zoom']
+
+        camera_server = MagicMock()
+        camera_server.started = False
+
+        return Simulation(camera_server)
+
+    @patch('ptzsimcam.sim.pb')
+    def test_gui_controller_Should_SetSpeedsInRadians(self, pb):
+        sim = self.create_simulation(pb)
+        camera = sim.camera
+
+        # A negative slider value gives a positive speed
+        for pan, tilt, sign in ((-1, -1, 1), (-12, -8, 1), (24, 23, -1), (5, 3, -1)):
+            with self.subTest(pan=pan, tilt=tilt):
+                sliders = {'pan': float(pan), 'tilt': float(tilt), 'zoom': 0.0}
+                pb.readUserDebugParameter.side_effect = sliders.get
+
+                sim.gui_controller()
+
+                self.assertAlmostEqual(math.radians(SPEEDS_LOOKUP[abs(pan)]) * sign, camera.pan_speed)
+                self.assertAlmostEqual(math.radians(SPEEDS_LOOKUP[abs(tilt)]) * sign, camera.tilt_speed)
+                self.assertAlmostEqual(SPEEDS_LOOKUP_RAD[abs(pan)] * sign, camera.pan_speed)
+                self.assertAlmostEqual(SPEEDS_LOOKUP_RAD[abs(tilt)] * sign, camera.tilt_speed)
+
+        self.assertEqual(4, camera.drive.call_count)